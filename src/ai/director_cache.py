@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import time
+from config import (DIRECTOR_CACHE_DIR, DIRECTOR_CACHE_ENTRIES, DIRECTOR_CACHE_MAX_AGE, DIRECTOR_CACHE_POLICY,
+                    DIRECTOR_HEALTH_BUCKET, DIRECTOR_KILLS_BUCKET)
+from ai.director_config import DirectorConfig
+
+def director_key(floor, level, kills, health, theme):
+    """Normalize the director inputs so that players in similar shape share a config."""
+    return {
+        "floor": int(floor),
+        "level": int(level),
+        "health": int(health) // DIRECTOR_HEALTH_BUCKET,
+        "kills": int(kills) // DIRECTOR_KILLS_BUCKET,
+        "theme": str(theme).strip().lower(),
+    }
+
+
+class DirectorCache:
+    """Director configs on disk, one JSON file per normalized input key, evicted least recently used first.
+
+    policy is "reuse" to serve cached configs, "refresh" to always ask the
+    director but keep its answers for later, or "off". Entries older than
+    max_age seconds are not served; None keeps them forever.
+    """
+
+    def __init__(self, directory=DIRECTOR_CACHE_DIR, max_entries=DIRECTOR_CACHE_ENTRIES,
+                 policy=DIRECTOR_CACHE_POLICY, max_age=DIRECTOR_CACHE_MAX_AGE):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.policy = policy
+        self.max_age = max_age
+
+    def path_for(self, key):
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def load(self, key):
+        """Return the cached config for key, or None on a miss or when the policy does not reuse."""
+        if self.policy != "reuse":
+            return None
+        path = self.path_for(key)
+        try:
+            if self.max_age is not None and time.time() - os.path.getmtime(path) > self.max_age:
+                return None
+            with open(path, "r") as file:
+                config = DirectorConfig.from_dict(json.load(file)["config"])
+            # The modification time doubles as the last use for LRU eviction
+            os.utime(path)
+            return config
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Ignoring unreadable director cache entry {path}: {e}")
+            return None
+
+    def store(self, key, config):
+        if self.policy == "off":
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(key)
+
+        # Write to a temporary file first so a crash never leaves a truncated entry behind
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"key": key, "config": config.to_dict()}, file, default=str)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently used entries beyond max_entries."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.endswith(".json"):
+                    entries.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                # Removed by a concurrent eviction
+                pass
+        entries.sort()
+        for _, path in entries[:max(len(entries) - self.max_entries, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,97 @@
+import os
+import threading
+import yaml
+
+from ai.director_schema import repair_section
+from core.systems.tile import Tile, factory
+from core.objects.enemy import enemy_factory
+from core.objects.item import item_factory
+from core.objects.statics import static_factory
+
+# Sections of a director response, in the order the prompt asks for them: what the
+# floor layout needs comes first, so generation can start while the rest streams in
+SECTIONS = ("tiles", "dungeon", "statics", "enemies", "items")
+# Sections the floor layout is generated from
+LAYOUT_SECTIONS = ("tiles", "dungeon")
+# Loaded by fallback_config on first use
+_fallback = None
+
+def validate_config(data):
+    """Repair every section of a parsed director response, see repair_section; raise ValueError if one is unusable."""
+    if not isinstance(data, dict):
+        raise ValueError("Director response is not a mapping")
+    return {section: repair_section(section, data.get(section)) for section in SECTIONS}
+
+
+def fallback_config():
+    """The definitions shipped in src/config, for when the director cannot provide a section."""
+    global _fallback
+    if _fallback is None:
+        data = {}
+        for section in SECTIONS:
+            with open(os.path.abspath(f"src/config/{section}.yaml"), "r") as file:
+                data.update(yaml.safe_load(file))
+        _fallback = DirectorConfig.from_dict(data)
+    return _fallback
+
+
+def apply_section(section, entries):
+    """Load one validated section into its factory; dungeon settings are handed to the Dungeon instead."""
+    if section == "tiles":
+        for tile in entries:
+            factory.register_tile(tile["name"], Tile, tuple(tile["color"]), tile["collide"], tile["wall"], tile["rarity"])
+    elif section == "enemies":
+        enemy_factory.enemy_definitions = entries
+    elif section == "items":
+        item_factory.item_definitions = entries
+    elif section == "statics":
+        static_factory.enemy_definitions = entries
+
+
+class DirectorConfig:
+    """Everything the game director decided for a floor, held in memory.
+
+    items, enemies, tiles and statics are lists of definitions in the format
+    of the YAML files under src/config; dungeon is the settings of the floor
+    itself, as Dungeon.apply_dungeon_settings reads them.
+    """
+
+    def __init__(self, items, enemies, tiles, statics, dungeon):
+        self.items = items
+        self.enemies = enemies
+        self.tiles = tiles
+        self.statics = statics
+        self.dungeon = dungeon
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a config from a parsed director response; raise ValueError if it is incomplete."""
+        data = validate_config(data)
+        return cls(data["items"], data["enemies"], data["tiles"], data["statics"], data["dungeon"][0])
+
+    def to_dict(self):
+        return {
+            "tiles": self.tiles,
+            "dungeon": [self.dungeon],
+            "statics": self.statics,
+            "enemies": self.enemies,
+            "items": self.items,
+        }
+
+    def apply(self):
+        """Load the definitions into the factories; the dungeon settings go to the next Dungeon."""
+        for section, entries in self.to_dict().items():
+            apply_section(section, entries)
+
+    def snapshot(self, directory):
+        """Write the config as the five YAML files the factories can load, e.g. to inspect or replay a floor."""
+        os.makedirs(directory, exist_ok=True)
+        for section, data in self.to_dict().items():
+            with open(os.path.join(directory, f"{section}.yaml"), "w") as file:
+                yaml.safe_dump({section: data}, file)
+
+    def snapshot_async(self, directory):
+        """snapshot on a background thread, so writing never holds up loading a floor."""
+        thread = threading.Thread(target=self.snapshot, args=(directory,), daemon=True)
+        thread.start()
+        return thread
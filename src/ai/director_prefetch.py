@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+from config import DIRECTOR_PREFETCH_IN_FLIGHT
+from ai.director_cache import director_key
+from ai.director_stream import DirectorResponse
+from ai.game_director import stream_config
+
+class DirectorPrefetcher:
+    """Ask the game director for the next floor while the current one is played.
+
+    prefetch guesses the request from the player's current stats and is
+    called every frame; only a change of the normalized director key sends a
+    new request. At the stairs, take reuses the speculative request if the
+    player's final stats fall in the same buckets. Requests run on a pool of
+    max_in_flight threads, and a newer guess cancels the requests it
+    supersedes: waiting ones never start and streaming ones stop at their
+    next chunk.
+    """
+
+    def __init__(self, max_in_flight=DIRECTOR_PREFETCH_IN_FLIGHT):
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="director")
+        # DirectorResponses by director key, oldest first
+        self.requests = {}
+        self.last_key = None
+
+    def key_of(self, floor, level, kills, health, theme):
+        return tuple(sorted(director_key(floor, level, kills, health, theme).items()))
+
+    def prefetch(self, floor, level, kills, health, theme):
+        """Start a speculative request for the next floor unless one for the same buckets exists."""
+        key = self.key_of(floor, level, kills, health, theme)
+        if key == self.last_key:
+            return
+        self.last_key = key
+        self.cancel(keep=key)
+        self.submit(key, floor, level, kills, health, theme)
+
+    def guess(self):
+        """The DirectorResponse of the latest speculative request, or None if there is none."""
+        return self.requests.get(self.last_key)
+
+    def take(self, floor, level, kills, health, theme):
+        """Return the DirectorResponse for the player's final stats, reusing a matching speculative request."""
+        key = self.key_of(floor, level, kills, health, theme)
+        self.cancel(keep=key)
+        response = self.submit(key, floor, level, kills, health, theme)
+        # The next floor starts guessing afresh
+        self.requests = {}
+        self.last_key = None
+        return response
+
+    def submit(self, key, floor, level, kills, health, theme):
+        # A request whose worker failed is asked again rather than reused
+        if key not in self.requests or self.requests[key].error() is not None:
+            response = DirectorResponse()
+            response.future = self.executor.submit(stream_config, floor, level, kills, health, theme, response)
+            self.requests[key] = response
+        return self.requests[key]
+
+    def cancel(self, keep=None):
+        """Cancel every request except the one for keep; finished ones are already in the director cache."""
+        for key, response in list(self.requests.items()):
+            if key != keep:
+                response.cancel()
+                del self.requests[key]
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
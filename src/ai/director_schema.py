@@ -0,0 +1,170 @@
+from config import DIRECTOR_MAX_AMOUNT, DIRECTOR_MAX_DUNGEON_SIZE, DIRECTOR_MIN_DUNGEON_SIZE, DUNGEON_HEIGHT, DUNGEON_WIDTH
+
+# Every field is declared as (coercer, default). A value that cannot be coerced is
+# replaced by the default, which matches the .get(...) fallback of the factory that
+# reads it; a default of REQUIRED means the entry is unusable without the field.
+REQUIRED = object()
+
+def as_int(value):
+    return int(float(value))
+
+
+def as_float(value):
+    return float(value)
+
+
+def as_str(value):
+    if isinstance(value, (dict, list)) or value is None:
+        raise ValueError(f"Expected text, got {value!r}")
+    return str(value)
+
+
+def as_flag(value):
+    """0 or 1, as the tile tables compare wall and collide against them."""
+    if isinstance(value, str):
+        return int(value.strip().lower() in ("1", "true", "yes"))
+    return int(bool(value))
+
+
+def as_color(value):
+    channels = [max(0, min(255, as_int(channel))) for channel in value]
+    if len(channels) < 3:
+        raise ValueError(f"Expected an [R, G, B] color, got {value!r}")
+    return channels[:3]
+
+
+def clamped(coerce, low, high):
+    def coerce_clamped(value):
+        return max(low, min(high, coerce(value)))
+    return coerce_clamped
+
+
+def one_of(*choices):
+    def coerce_choice(value):
+        value = as_str(value).strip()
+        for choice in choices:
+            if value.lower() == choice.lower():
+                return choice
+        raise ValueError(f"Expected one of {', '.join(choices)}, got {value!r}")
+    return coerce_choice
+
+
+amount = clamped(as_int, 0, DIRECTOR_MAX_AMOUNT)
+
+SCHEMAS = {
+    "tiles": {
+        "name": (as_str, REQUIRED),
+        "color": (as_color, REQUIRED),
+        "collide": (as_flag, REQUIRED),
+        "wall": (as_flag, REQUIRED),
+        "rarity": (clamped(as_float, 0.0, 1000.0), 50.0),
+    },
+    "dungeon": {
+        "name": (as_str, "Dungeon"),
+        "rooms": (clamped(as_int, 1, 100), 5),
+        "room_min_size": (clamped(as_int, 3, 40), 5),
+        "room_max_size": (clamped(as_int, 3, 60), 10),
+        "theme": (as_str, "None"),
+        "width": (clamped(as_int, DIRECTOR_MIN_DUNGEON_SIZE, DIRECTOR_MAX_DUNGEON_SIZE), DUNGEON_WIDTH),
+        "height": (clamped(as_int, DIRECTOR_MIN_DUNGEON_SIZE, DIRECTOR_MAX_DUNGEON_SIZE), DUNGEON_HEIGHT),
+        "wiggly": (clamped(as_float, 0.0, 1.0), 0.2),
+        "smoothing": (clamped(as_int, 0, 4), 1),
+        # Left out, generator_settings_of picks it from the room count
+        "scalable": (as_flag, None),
+    },
+    "enemies": {
+        "type": (as_str, REQUIRED),
+        "name": (as_str, "Unnamed Enemy"),
+        "health": (clamped(as_int, 1, 10000), 10),
+        "damage": (clamped(as_int, 0, 10000), 2),
+        "speed": (clamped(as_float, 0.01, 0.1), 0.01),
+        "armor": (clamped(as_int, 0, 10000), 0),
+        "vision_radius": (clamped(as_int, 0, 64), 5),
+        "xp": (clamped(as_int, 0, 10000), 1),
+        "color": (as_color, [255, 0, 0]),
+        "amount": (amount, 0),
+    },
+    "items": {
+        "type": (as_str, None),
+        "name": (as_str, REQUIRED),
+        "description": (as_str, "No description"),
+        "rarity": (as_str, "common"),
+        "amount": (amount, 0),
+    },
+    "weapon": {
+        "damage": (as_int, 0),
+        "speed": (as_float, 1),
+        "area": (clamped(as_float, 0.1, 10.0), 1),
+        "class": (one_of("melee", "ranged"), "melee"),
+    },
+    "armor": {
+        "defense": (as_int, 0),
+        "movespeed": (as_float, 1),
+        "class": (as_str, "light"),
+    },
+    "statics": {
+        "type": (as_str, REQUIRED),
+        "name": (as_str, "Unnamed Static"),
+        "health": (clamped(as_int, 1, 10000), 10),
+        "class": (one_of("Torch", "Bomb"), "Torch"),
+        "area": (clamped(as_int, 0, 64), 5),
+        "damage": (clamped(as_int, 0, 10000), 2),
+        "cooldown": (clamped(as_int, 0, 600000), 5000),
+        "color": (as_color, [255, 255, 0]),
+        "amount": (amount, 0),
+    },
+}
+
+# Compiled once: per schema, a tuple of (key, coercer, default) to run through in order
+COMPILED = {name: tuple((key, coerce, default) for key, (coerce, default) in fields.items())
+            for name, fields in SCHEMAS.items()}
+
+
+def repair_entry(schema, entry):
+    """Return a copy of entry with every field of schema coerced or defaulted, or None if it is unusable.
+
+    Keys the schema does not know are kept as they are.
+    """
+    repaired = dict(entry)
+    for key, coerce, default in COMPILED[schema]:
+        try:
+            repaired[key] = coerce(entry[key])
+        except (KeyError, TypeError, ValueError):
+            if default is REQUIRED:
+                return None
+            repaired[key] = default
+    return repaired
+
+
+def repair_section(section, entries):
+    """Coerce a section of a director response into what the factories expect; raise ValueError if it cannot be."""
+    if isinstance(entries, dict):
+        # A single entry given without the surrounding list
+        entries = [entries]
+    if not isinstance(entries, list):
+        raise ValueError(f"Director response has no '{section}' list")
+
+    repaired = [repair_entry(section, entry) for entry in entries if isinstance(entry, dict)]
+    repaired = [entry for entry in repaired if entry is not None]
+    if section == "items":
+        for index, entry in enumerate(repaired):
+            if entry["type"] in ("weapon", "armor"):
+                repaired[index] = repair_entry(entry["type"], entry)
+    elif section == "dungeon":
+        for entry in repaired[:1]:
+            entry["room_min_size"] = min(entry["room_min_size"], entry["room_max_size"])
+            # Rooms must fit inside the map with a border around them
+            entry["room_max_size"] = min(entry["room_max_size"], min(entry["width"], entry["height"]) // 2)
+            entry["room_min_size"] = min(entry["room_min_size"], entry["room_max_size"])
+    elif section == "tiles":
+        if not any(tile["wall"] for tile in repaired) or all(tile["wall"] for tile in repaired):
+            raise ValueError("Director response needs both wall and floor tiles")
+
+    if not repaired:
+        raise ValueError(f"Director response has no usable '{section}' entries")
+    # Later entries with the same identifier would never be used by the factories
+    identifier = {"tiles": "name", "enemies": "type", "items": "name", "statics": "type"}.get(section)
+    if identifier is not None:
+        seen = set()
+        repaired = [entry for entry in repaired if not (entry[identifier] in seen or seen.add(entry[identifier]))]
+    return repaired
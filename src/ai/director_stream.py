@@ -0,0 +1,122 @@
+import re
+import threading
+import yaml
+
+from config import DIRECTOR_SNAPSHOT_DIR
+from ai.director_config import SECTIONS, DirectorConfig, apply_section
+from ai.director_schema import repair_section
+
+# A line starting one of the documents, e.g. "tiles:" at the start of the line
+SECTION_HEADER = re.compile(r"^(%s):\s*$" % "|".join(SECTIONS))
+
+class DocumentSplitter:
+    """Cut a streamed director response into its YAML documents as soon as each one is complete.
+
+    A document ends where the next one's top-level key starts, or where the
+    response ends. Code fences and emphasis are stripped line by line, as
+    the whole response used to be. A document that cannot be parsed or
+    repaired is left out, so the rest of the response is still used.
+    """
+
+    def __init__(self):
+        self.partial = ""
+        self.section = None
+        self.lines = []
+
+    def feed(self, text):
+        """Add streamed text; return (section, entries) for every document it completed."""
+        self.partial += text
+        *lines, self.partial = self.partial.split("\n")
+        completed = []
+        for line in lines:
+            line = re.sub(r"```yaml|```|\*", "", line)
+            header = SECTION_HEADER.match(line)
+            if header:
+                completed += self.finish_document()
+                self.section = header.group(1)
+            elif line.strip() != "---":
+                self.lines.append(line)
+        return completed
+
+    def close(self):
+        """Flush the last document once the response has ended."""
+        completed = self.feed("\n")
+        return completed + self.finish_document()
+
+    def finish_document(self):
+        section, lines = self.section, self.lines
+        self.section, self.lines = None, []
+        if section is None:
+            # Anything before the first document is commentary
+            return []
+        try:
+            data = yaml.safe_load("\n".join([f"{section}:"] + lines))
+            return [(section, repair_section(section, data[section]))]
+        except (yaml.YAMLError, ValueError, TypeError, KeyError) as e:
+            print(f"Discarding the director's {section}: {e}")
+            return []
+
+
+class DirectorResponse:
+    """A director config arriving section by section from a worker thread.
+
+    The worker adds sections as they are parsed and calls finish once every
+    section is there; the game polls has and calls apply_arrived on its own
+    thread, which loads every section that has arrived since into the
+    factories.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sections = {}
+        self.applied = set()
+        self.done = False
+        self.cancelled = False
+        # The Future running the request, set by whoever submits it
+        self.future = None
+
+    def add(self, section, entries):
+        """Keep the first valid copy of a section; a retried request never replaces what the game may have used."""
+        with self.lock:
+            self.sections.setdefault(section, entries)
+
+    def missing(self):
+        with self.lock:
+            return [section for section in SECTIONS if section not in self.sections]
+
+    def finish(self):
+        self.done = True
+
+    def cancel(self):
+        """Stop the request: drop it if it has not started, end its stream at the next chunk otherwise."""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+    def error(self):
+        """The exception the worker running the request raised, or None while it runs or if it did not."""
+        if self.future is None or not self.future.done() or self.future.cancelled():
+            return None
+        return self.future.exception()
+
+    def has(self, *sections):
+        with self.lock:
+            return all(section in self.sections for section in sections)
+
+    def config(self):
+        with self.lock:
+            return DirectorConfig.from_dict(self.sections)
+
+    def apply_arrived(self):
+        """Load the sections that arrived since the last call; return True once all of them are loaded."""
+        with self.lock:
+            arrived = [(section, self.sections[section]) for section in SECTIONS
+                       if section in self.sections and section not in self.applied]
+        for section, entries in arrived:
+            apply_section(section, entries)
+            self.applied.add(section)
+
+        complete = len(self.applied) == len(SECTIONS)
+        if arrived and complete and DIRECTOR_SNAPSHOT_DIR is not None:
+            self.config().snapshot_async(DIRECTOR_SNAPSHOT_DIR)
+        return complete
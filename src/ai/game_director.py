@@ -1,9 +1,14 @@
 from openai import OpenAI
+from ai.director_cache import DirectorCache, director_key
+from ai.director_config import SECTIONS, fallback_config
+from ai.director_stream import DirectorResponse, DocumentSplitter
+from config import DIRECTOR_ATTEMPTS, DIRECTOR_DEADLINE, DIRECTOR_SNAPSHOT_DIR, DIRECTOR_TIMEOUT
 from core.systems.tile import *
 from core.systems.dungeon import Dungeon
 import re
 import random
-import sys
+import time
+import yaml
 
 from core.systems.tile import factory
 from core.objects.enemy import enemy_factory
@@ -12,12 +17,58 @@ from core.objects.statics import static_factory
 
 # Initialize the OpenAI API key (replace with your actual API key)
 api_key = ""
+# Retries are made by stream_config, which only asks again for what is still missing
 client = OpenAI(
     api_key=api_key,
+    max_retries=0,
 )
 
+director_cache = DirectorCache()
+
 def generate_yaml(floor, level, kills, health, theme="None"):
-    def request_yaml():
+    apply_config(request_config(floor, level, kills, health, theme))
+
+
+def request_config(floor, level, kills, health, theme="None"):
+    """Return the complete director config for the player's stats, waiting for all of it."""
+    response = DirectorResponse()
+    stream_config(floor, level, kills, health, theme, response)
+    return response.config()
+
+
+def stream_config(floor, level, kills, health, theme, response):
+    """Fill a DirectorResponse for the player's stats, from the cache or a streamed completion.
+
+    Every YAML document of the completion is parsed, repaired and added to
+    response as soon as it is complete. Sections that are missing or beyond
+    repair are asked for again on their own, up to DIRECTOR_ATTEMPTS requests
+    within DIRECTOR_DEADLINE seconds; whatever is still missing then comes
+    from the definitions shipped in src/config, so the response always
+    completes. Nothing is loaded into the factories, so this is safe to run
+    on a worker thread while a floor is being played.
+    """
+    # Players in similar shape get the same floor without another round trip to the director
+    key = director_key(floor, level, kills, health, theme)
+    config = director_cache.load(key)
+    if config is not None:
+        print("Using cached director config")
+        for section, entries in config.to_dict().items():
+            response.add(section, entries)
+        response.finish()
+        return
+
+    def request_yaml(sections, deadline):
+      documents = "\n".join(f"{number}. {section}.yaml" for number, section in enumerate(sections, 1))
+      with response.lock:
+          accepted = [(section, response.sections[section]) for section in SECTIONS
+                      if section in response.sections and section not in sections]
+      context = ""
+      if accepted:
+          # A retry: the sections already accepted stay, so the ones asked for again must fit them
+          context = "These YAML documents were already decided and will be used as they are. " \
+                    "Make the documents above fit them, e.g. in theme, colors and difficulty:\n\n"
+          context += "\n".join(f"```yaml\n{yaml.safe_dump({section: entries}, sort_keys=False)}```"
+                                for section, entries in accepted)
       prompt = f"""
 You are helping me generate YAML configuration files for a tile-based roguelike game. I have a few categories of data to define: items, enemies, tiles and dungeon. Each category should produce a separate YAML file with a top-level key (e.g., "items", "enemies", "tiles") and a list of entries under it.
 
@@ -105,78 +156,77 @@ Make sure enemies have colors that stand out from the tiles.
 
 Last Theme: {theme}
 
-Please respond with five separate YAML documents in one response, in the following order:
+Please respond with only these separate YAML documents in one response, in the following order:
+
+{documents}
 
-1. items.yaml
-2. enemies.yaml
-3. tiles.yaml
-4. statics.yaml
-5. dungeon.yaml
+{context}
 
 Do not include any extra commentary, just the YAML contents.
 
       """
 
 
-      response = client.chat.completions.create(
+      stream = client.chat.completions.create(
           model="gpt-3.5-turbo",
           messages=[
               {"role": "system", "content": "You are a balanced dungeon master, giving your players a fun experience."},
               {"role": "user", "content": prompt}
           ],
-          temperature=0.7
+          temperature=0.7,
+          stream=True,
+          # Bounds the wait for every read, so a stalled stream cannot outlast the deadline by much
+          timeout=max(min(DIRECTOR_TIMEOUT, deadline - time.monotonic()), 1)
       )
-      code = response.choices[0].message.content
 
-      # Clean up the response
-      cleaned_code = re.sub(r"```yaml|```|\*", "", code).strip()
-      print(cleaned_code)
-      return cleaned_code
-
-    for attempt in range(2):
+      # Hand over each document as soon as the next one starts
+      splitter = DocumentSplitter()
+      try:
+          for chunk in stream:
+              if response.cancelled:
+                  return
+              if time.monotonic() > deadline:
+                  print("The game director ran out of time")
+                  return
+              text = chunk.choices[0].delta.content if chunk.choices else None
+              if text:
+                  for section, entries in splitter.feed(text):
+                      print(f"Received {section}")
+                      response.add(section, entries)
+          for section, entries in splitter.close():
+              print(f"Received {section}")
+              response.add(section, entries)
+      finally:
+          stream.close()
+
+    deadline = time.monotonic() + DIRECTOR_DEADLINE
+    for attempt in range(DIRECTOR_ATTEMPTS):
+        missing = response.missing()
+        if not missing or time.monotonic() >= deadline:
+            break
         try:
-            print(f"Attempt {attempt + 1} to generate YAML")
-            cleaned_code = request_yaml()
-            data = yaml.safe_load(cleaned_code)
-
-            items_data = {"items": data["items"]}
-            enemies_data = {"enemies": data["enemies"]}
-            tiles_data = {"tiles": data["tiles"]}
-            statics_data = {"statics": data["statics"]}
-            dungeon_data = {"dungeon": data["dungeon"]}
-
-            # Write YAML files
-            with open("items.yaml", "w") as file:
-                yaml.safe_dump(items_data, file)
-
-            with open("enemies.yaml", "w") as file:
-                yaml.safe_dump(enemies_data, file)
-
-            with open("tiles.yaml", "w") as file:
-                yaml.safe_dump(tiles_data, file)
-
-            with open("statics.yaml", "w") as file:
-                yaml.safe_dump(statics_data, file)
-
-            with open("dungeon.yaml", "w") as file:
-                yaml.safe_dump(dungeon_data, file)
-
-            print("Files generated successfully!")
-
-            # Load factories
-            factory.load_tile_definitions("tiles.yaml")
-            enemy_factory.load_enemy_definitions("enemies.yaml")
-            item_factory.load_item_definitions("items.yaml")
-            static_factory.load_static_definitions("statics.yaml")
-
-            print("Factories loaded successfully!")
-            return  # Exit function on success
-
+            print(f"Attempt {attempt + 1} to generate YAML for {', '.join(missing)}")
+            request_yaml(missing, deadline)
         except Exception as e:
             print(f"Error during YAML generation: {e}")
-
-    # If we reach here, all attempts failed
-    print("Failed to generate YAML after 2 attempts. Exiting program.")
-    pygame.quit()
-    sys.exit()
-
+        if response.cancelled:
+            return
+
+    missing = response.missing()
+    if missing:
+        # Never leave the game without a floor; a partly built-in config is not cached
+        print(f"Using the built-in {', '.join(missing)} in place of the director's")
+        fallback = fallback_config().to_dict()
+        for section in missing:
+            response.add(section, fallback[section])
+    else:
+        director_cache.store(key, response.config())
+    response.finish()
+
+
+def apply_config(config):
+    """Load a director config into the factories, snapshotting it to disk in the background if enabled."""
+    config.apply()
+    print("Factories loaded successfully!")
+    if DIRECTOR_SNAPSHOT_DIR is not None:
+        config.snapshot_async(DIRECTOR_SNAPSHOT_DIR)
@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+
+# Run without a window, e.g. `python src/benchmark.py render`
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from config import *
+
+
+def benchmark_render(frames=300):
+    """Time every renderer backend on the same floor, walking the player through it."""
+    from core.systems.camera import Camera
+    from core.systems.dungeon import Dungeon
+    from core.systems.renderer import RENDERERS
+    from core.objects.player import Player
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    view_distance = VIEW_ZONE * 2
+    virtual_screen = pygame.Surface((view_distance * TILE_SIZE_X, view_distance * TILE_SIZE_Y))
+
+    dungeon = Dungeon()
+    spawn_x, spawn_y = dungeon.find_spawn_point()
+    player = Player(dungeon, spawn_x, spawn_y)
+    dungeon.add_entity(player)
+
+    for name, renderer_class in RENDERERS.items():
+        camera = Camera(view_distance, dungeon.width, dungeon.height)
+        renderer = renderer_class(screen, camera)
+
+        start = time.perf_counter()
+        for frame in range(frames):
+            # Sweep the camera across the map so chunk and window costs are both exercised
+            player.x = (spawn_x + frame * 0.25) % dungeon.width
+            camera.update(player)
+            renderer.render(dungeon, player, virtual_screen)
+        elapsed = time.perf_counter() - start
+
+        print(f"{name:>6}: {elapsed / frames * 1000:.3f} ms/frame over {frames} frames")
+
+    pygame.quit()
+
+
+def benchmark_floor(floors=20):
+    """Compare generating floor layouts with loading the same layouts from the floor cache."""
+    import tempfile
+    from core.systems.dungeon import Dungeon
+    from core.systems.floor_cache import FloorCache, definitions_hash
+    from core.systems.floor_layout import generate_floor_layout
+
+    settings = Dungeon(seed=0).generator_settings()
+    digest = definitions_hash(settings)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = FloorCache(directory)
+
+        start = time.perf_counter()
+        for seed in range(floors):
+            cache.store(generate_floor_layout(settings, seed), digest)
+        generated = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for seed in range(floors):
+            cache.load(seed, digest)
+        loaded = time.perf_counter() - start
+
+    print(f"generate: {generated / floors * 1000:.3f} ms/floor over {floors} floors")
+    print(f"  cached: {loaded / floors * 1000:.3f} ms/floor over {floors} floors")
+
+
+def benchmark_rooms(counts=(250, 500, 1000, 2000, 4000), classic_limit=2000):
+    """Time room placement and the corridor MST for growing room counts, classic against scalable mode.
+
+    The map grows with the room count so the room density stays the same;
+    corridor carving and smoothing are left out as they are shared by both modes.
+    """
+    import math
+    import random
+    import numpy as np
+    from core.systems.dungeon_generator import DungeonGenerator
+
+    for count in counts:
+        side = int(math.sqrt(count) * 24)
+        for scalable in (False, True):
+            if not scalable and count > classic_limit:
+                continue
+            generator = DungeonGenerator(width=side, height=side, num_rooms=count, room_min_size=4,
+                                         room_max_size=10, scalable=scalable, rng=random.Random(count))
+            generator.grid = np.zeros((side, side), dtype=np.uint8)
+
+            start = time.perf_counter()
+            generator.generate_rooms()
+            placed = time.perf_counter()
+            edges = generator.mst_edges()
+            connected = time.perf_counter()
+
+            mode = "scalable" if scalable else "classic"
+            print(f"{count:>5} rooms {mode:>8}: placed {len(generator.rooms):>5} in {(placed - start) * 1000:8.1f} ms, "
+                  f"MST of {len(edges):>5} edges in {(connected - placed) * 1000:8.1f} ms")
+
+
+BENCHMARKS = {
+    "render": benchmark_render,
+    "floor": benchmark_floor,
+    "rooms": benchmark_rooms,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
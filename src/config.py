@@ -7,12 +7,56 @@ TICK_RATE = 64
 DUNGEON_HEIGHT = 80
 DUNGEON_WIDTH = 120
 DUNGEON_ROOMS = DUNGEON_HEIGHT*DUNGEON_WIDTH/50
+ENEMY_SPAWN_CLEARANCE = 10  # Minimum distance in tiles between enemy spawns and the player spawn
+FLOW_FIELD_RADIUS = 32  # Steps around the player covered by the enemy pursuit flow field
+ROOM_PLACEMENT_RETRIES = 10  # Placement attempts per requested room in scalable generation
+SCALABLE_ROOM_COUNT = 300  # Room count from which floors use scalable generation unless their definition says otherwise
+ROOM_GRAPH_NEIGHBOURS = 6  # Nearest rooms considered for corridors in scalable generation
+PATH_CORRIDOR_MARGIN = 8  # Tiles around two rooms searched for the corridor joining them
+PATH_ENTRY_RADIUS = 32  # Steps searched from a tile outside any room to reach the room graph
+CHUNKED_WORLD = False  # Stream endless floors chunk by chunk instead of generating them whole
+WORLD_CHUNK_SIZE = 64  # Tiles per side of a chunk of a chunked world
+WORLD_CHUNKS_ACROSS = 1024  # Chunks per side of a chunked world
+WORLD_CHUNK_CACHE = 16  # Chunks kept in memory before the least recently used is written out
+WORLD_CHUNK_PRELOAD = 16  # Tiles beyond the camera view whose chunks are loaded ahead of time
+WORLD_CHUNK_DIR = ".world_chunks"  # Directory evicted chunks are written to
+WORLD_STAIRS_DISTANCE = 4  # Chunks between the start of a chunked floor and its stairs
+MEMORY_REPORT = False  # Print a memory report, traced with tracemalloc, whenever a new floor starts
+FLOOR_BUILD_CELLS = 8192  # Tiles generated per step of the time-sliced floor construction
+FLOOR_BUILD_SPAWNS = 8  # Entities spawned per step of the time-sliced floor construction
+FLOOR_BUILD_BUDGET_MS = 8  # Time spent building the next floor in each loading screen frame
+WORLD_SEED = None  # Set to an integer to generate the same floors every run
+FLOOR_CACHE_DIR = ".floor_cache"  # Directory of cached generated floor layouts
+FLOOR_CACHE_ENTRIES = 64  # Floor layouts kept before the least recently used is deleted
+SIM_TICKS = 7200  # Frames a headless simulation runs before giving up on the stairs
+SIM_SEEDS = 64  # Floors played by a headless balance sweep
+BOT_FIGHT_RADIUS = 6  # Tiles within which the simulation bot turns to fight an enemy
+BOT_STUCK_FRAMES = 30  # Frames without progress after which the bot attacks whatever blocks it
+DIRECTOR_CACHE_DIR = ".director_cache"  # Directory of cached game director configs
+DIRECTOR_CACHE_ENTRIES = 256  # Director configs kept before the least recently used is deleted
+DIRECTOR_CACHE_POLICY = "reuse"  # "reuse" cached configs, "refresh" them on every request, or "off"
+DIRECTOR_CACHE_MAX_AGE = None  # Seconds a cached director config is served for, None for no limit
+DIRECTOR_HEALTH_BUCKET = 5  # Player health points that share a cached director config
+DIRECTOR_KILLS_BUCKET = 5  # Player kills that share a cached director config
+DIRECTOR_SNAPSHOT_DIR = None  # Directory each applied director config is written to as YAML, None to skip
+DIRECTOR_ATTEMPTS = 3  # Director requests made for one floor; each only asks for the sections still missing
+DIRECTOR_DEADLINE = 20  # Seconds before built-in definitions stand in for what the director has not provided
+DIRECTOR_TIMEOUT = 10  # Seconds a director request may wait for the next part of its response
+DIRECTOR_MAX_AMOUNT = 20  # Most entities of one definition the director may place on a floor
+DIRECTOR_MIN_DUNGEON_SIZE = 40  # Smallest width and height the director may choose for a floor
+DIRECTOR_MAX_DUNGEON_SIZE = 400  # Largest width and height the director may choose for a floor
+DIRECTOR_PREFETCH = True  # Ask the director for the next floor while the current one is played
+DIRECTOR_PREFETCH_IN_FLIGHT = 2  # Director requests running at once; superseded waiting ones are cancelled
 
 NUM_TILES_X = 400  # Number of tiles horizontally
 NUM_TILES_Y = 400  # Number of tiles vertically
 
 VIEW_ZONE = 20
 LIGHT_RADIUS = 5
+BRIGHTNESS_LEVELS = 4  # Brightness is quantized to steps of 1 / BRIGHTNESS_LEVELS
+
+TILE_CHUNK_SIZE = 32  # Tiles per side of a pre-rendered floor chunk
+RENDER_BACKEND = "blit"  # "blit" (cached chunk surfaces) or "array" (NumPy pixel compositing)
 
 TILE_SIZE_X = SCREEN_WIDTH // NUM_TILES_X
 TILE_SIZE_Y = SCREEN_HEIGHT // NUM_TILES_Y
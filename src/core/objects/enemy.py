@@ -1,5 +1,6 @@
 import random
 from core.objects.entity import Entity
+from core.systems.game_clock import get_ticks
 from config import TILE_SIZE_X, TILE_SIZE_Y
 from core.objects.player import Player
 import yaml
@@ -19,6 +20,10 @@ class Enemy(Entity):
 
         self.xp = xp
 
+        # Long-range route from the dungeon's pathfinder, and the tile it leads to
+        self.path = []
+        self.path_goal = None
+
         self.cooldown_base = 1000  # Cooldown in milliseconds
         self.__cooldown = 0
         self.cooldown = self.cooldown_base
@@ -29,10 +34,10 @@ class Enemy(Entity):
             self.die()
             return
 
-        target = self.can_see_player(self.dungeon.all_entities)
+        target = self.can_see_player(self.dungeon.entities_near(self.x, self.y, self.vision_radius))
         if target:
             if self.distance_to(target) <= 1.5:
-                cur_time = pygame.time.get_ticks()
+                cur_time = get_ticks()
                 if self.__cooldown <= cur_time:
                     self.__cooldown = cur_time + self.cooldown
                     self.attack(target)
@@ -46,6 +51,40 @@ class Enemy(Entity):
             self.move(dx * self.speed, dy * self.speed)
 
     def chase_target(self, target):
+        """Step down the dungeon's shared flow field towards the target."""
+        flow_field = self.dungeon.flow_field
+        flow_field.update(target)
+        next_tile = flow_field.next_tile(int(self.x), int(self.y))
+        if next_tile is None:
+            # Beyond the flow field's reach, follow a route over the room graph instead
+            next_tile = self.next_path_tile(target)
+        if next_tile is None:
+            self.chase_directly(target)
+            return
+
+        # Move each axis separately so lining up with a corridor is not undone by a wall on the other axis
+        next_x, next_y = next_tile
+        self.move(max(-self.speed, min(self.speed, next_x - self.x)), 0)
+        self.move(0, max(-self.speed, min(self.speed, next_y - self.y)))
+
+    def next_path_tile(self, target):
+        """Return the next tile of a long-range path to the target, planning a new one when it moved."""
+        if self.dungeon.pathfinder is None:
+            return None
+        current = (int(self.x), int(self.y))
+        goal = (int(target.x), int(target.y))
+        if goal != self.path_goal:
+            self.path_goal = goal
+            self.path = self.dungeon.pathfinder.find_path(current, goal) or []
+
+        while self.path and self.path[0] == current:
+            self.path.pop(0)
+        if self.path and abs(self.path[0][0] - current[0]) + abs(self.path[0][1] - current[1]) > 1:
+            # Pushed off the route, e.g. by a blocked move along one axis: plan again from here
+            self.path = self.dungeon.pathfinder.find_path(current, goal) or []
+        return self.path[0] if self.path else None
+
+    def chase_directly(self, target):
         int_x, int_y = int(self.x), int(self.y)
         target_x, target_y = int(target.x), int(target.y)
 
@@ -78,8 +117,7 @@ class Enemy(Entity):
             target.take_damage(self.attack_damage, self)
 
     def die(self):
-        if self in self.dungeon.all_entities:
-            self.dungeon.all_entities.remove(self)
+        self.dungeon.remove_entity(self)
         print(f"{self.name} died")
 
     def can_see_player(self, entities):
@@ -26,6 +26,11 @@ class Entity(pygame.sprite.Sprite):
         new_x = self.x + dx
         new_y = self.y + dy
 
+        if not self.dungeon.wraps:
+            # Kept inside the border, so the wrap-around below never applies
+            new_x = min(max(new_x, 1), self.dungeon.width - 2)
+            new_y = min(max(new_y, 1), self.dungeon.height - 2)
+
         if new_x < 1:
             target_x = self.dungeon.width - 2
             if not self.dungeon.is_blocked_tile(target_x, int(new_y)):
@@ -66,12 +71,18 @@ class Entity(pygame.sprite.Sprite):
             self.y = old_y
             self.rect.topleft = (self.x * TILE_SIZE_X, self.y * TILE_SIZE_Y)
 
+        self.dungeon.spatial.update(self)
+
+    def place(self, tile_x, tile_y):
+        """Teleport to a tile position, keeping the rect and spatial index in sync."""
+        self.x, self.y = float(tile_x), float(tile_y)
+        self.rect.topleft = (int(self.x * TILE_SIZE_X), int(self.y * TILE_SIZE_Y))
+        self.dungeon.spatial.update(self)
+
     def check_entity_collision(self):
-        for ent in self.dungeon.all_entities:
-            if ent is not self:
-                if ent.collide:
-                    if self.rect.colliderect(ent.rect):
-                        return True
+        for ent in self.dungeon.entities_in_rect(self.rect):
+            if ent is not self and ent.collide:
+                return True
         return False
     
     def update(self):
@@ -88,8 +99,7 @@ class Entity(pygame.sprite.Sprite):
         while queue:
             cx, cy = queue.popleft()
             if not self.dungeon.is_blocked_tile(cx, cy):
-                self.x, self.y = float(cx), float(cy)
-                self.rect.topleft = (int(self.x * TILE_SIZE_X), int(self.y * TILE_SIZE_Y))
+                self.place(cx, cy)
                 found_tile = True
                 break
 
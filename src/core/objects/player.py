@@ -1,12 +1,23 @@
 import pygame
 import math
+import numpy as np
 from config import *
 from core.objects.entity import Entity
-from core.objects.projectile import Projectile
+from core.systems.game_clock import get_ticks
 from collections import deque
 
+class KeyboardController:
+    """Reads the arrow keys and space bar; controllers return (x direction, y direction, attack)."""
+
+    def poll(self, player):
+        keys = pygame.key.get_pressed()
+        move_x = (keys[pygame.K_RIGHT] and 1) or (keys[pygame.K_LEFT] and -1) or 0
+        move_y = (keys[pygame.K_DOWN] and 1) or (keys[pygame.K_UP] and -1) or 0
+        return move_x, move_y, keys[pygame.K_SPACE]
+
+
 class Player(Entity):
-    def __init__(self, dungeon, x, y):
+    def __init__(self, dungeon, x, y, controller=None):
         super().__init__(x, y, TILE_SIZE_X, TILE_SIZE_Y, (255, 255, 255), dungeon)
         self.speed = 0.05
 
@@ -24,6 +35,10 @@ class Player(Entity):
         self.level = 1
         self.xp = 0
         self.kills = 0
+        self.damage_taken = 0
+        self.dead = False
+
+        self.controller = controller if controller is not None else KeyboardController()
 
         self.cooldown_base = 1000
         self.__cooldown = 0
@@ -38,6 +53,14 @@ class Player(Entity):
         self.equipped_weapon = None
         self.equipped_armor = None
 
+    def enter_dungeon(self, dungeon, tile_x, tile_y):
+        """Move the player and the items it carries onto another floor."""
+        self.dungeon = dungeon
+        for item in (self.equipped_weapon, self.equipped_armor):
+            if item is not None:
+                item.dungeon = dungeon
+        self.place(tile_x, tile_y)
+
     def equip_item(self, item):
         if not hasattr(item, 'type'):
             print("Item has no type attribute, cannot equip.")
@@ -70,11 +93,10 @@ class Player(Entity):
     def drop_item(self, item):
         drop_x, drop_y = self.find_nearby_free_tile(int(self.x), int(self.y))
         if drop_x is not None and drop_y is not None:
-            item.x = drop_x
-            item.y = drop_y
-            item.rect.topleft = (int(drop_x * TILE_SIZE_X), int(drop_y * TILE_SIZE_Y))
-            if item not in self.dungeon.all_entities:
-                self.dungeon.all_entities.append(item)
+            item.dungeon = self.dungeon
+            item.place(drop_x, drop_y)
+            if item not in self.dungeon.spatial:
+                self.dungeon.add_entity(item)
             print(f"Dropped {item.name} at ({drop_x}, {drop_y})")
         else:
             print(f"No free tile found to drop {item.name}. Discarding it.")
@@ -94,7 +116,7 @@ class Player(Entity):
 
 
     def is_tile_occupied(self, tile_x, tile_y):
-        for ent in self.dungeon.all_entities:
+        for ent in self.dungeon.entities_near(tile_x, tile_y, 2):
             if int(ent.x) == tile_x and int(ent.y) == tile_y:
                 return True
         return False
@@ -116,7 +138,9 @@ class Player(Entity):
 
     def take_damage(self, amount, owner):
         print(amount, self.defense)
-        self.current_health -= max(amount - self.defense, 0)
+        damage = max(amount - self.defense, 0)
+        self.current_health -= damage
+        self.damage_taken += damage
         if self.current_health <= 0:
             self.die()
 
@@ -133,16 +157,8 @@ class Player(Entity):
         self.update_afterimages()
 
         # Handle movement
-        keys = pygame.key.get_pressed()
-        dx, dy = 0, 0
-        if keys[pygame.K_LEFT]:
-            dx = -self.speed
-        if keys[pygame.K_RIGHT]:
-            dx = self.speed
-        if keys[pygame.K_UP]:
-            dy = -self.speed
-        if keys[pygame.K_DOWN]:
-            dy = self.speed
+        move_x, move_y, attack = self.controller.poll(self)
+        dx, dy = move_x * self.speed, move_y * self.speed
 
         if dx != 0 or dy != 0:
             angle_radians = math.atan2(dy, dx)  # dy first, dx second
@@ -153,8 +169,8 @@ class Player(Entity):
 
             self.direction = angle_degrees
 
-        if keys[pygame.K_SPACE]:
-            cur_time = pygame.time.get_ticks()
+        if attack:
+            cur_time = get_ticks()
             if self.__cooldown <= cur_time:
                 self.__cooldown = cur_time + self.cooldown
                 if self.weapon_type == "ranged":
@@ -198,8 +214,7 @@ class Player(Entity):
         speed = 0.5
         range_in_tiles = 30
         damage = self.damage
-        proj = Projectile(self.dungeon, self.x, self.y, dx, dy, speed, range_in_tiles, damage, color=(255,255,0), owner=self)
-        self.dungeon.all_entities.append(proj)
+        self.dungeon.projectiles.spawn(self.x, self.y, dx, dy, speed, range_in_tiles, damage, color=(255,255,0), owner=self)
 
     def attack_arc(self):
         arc_spread = math.ceil(60 * self.attack_area)
@@ -210,11 +225,8 @@ class Player(Entity):
         range_in_tiles = 5 * self.attack_area
         damage = self.damage
 
-        for i in range(num_projectiles):
-            angle = start_angle + i * angle_step
-            dx, dy = self.direction_to_vector(angle)
-            proj = Projectile(self.dungeon, self.x, self.y, dx, dy, speed=0.5, range_in_tiles=range_in_tiles, damage=damage, color=(200,200,50), acceleration=-0.2, owner=self)
-            self.dungeon.all_entities.append(proj)
+        angles = np.radians(start_angle + np.arange(num_projectiles) * angle_step)
+        self.dungeon.projectiles.spawn_many(self.x, self.y, np.cos(angles), np.sin(angles), speed=0.5, range_in_tiles=range_in_tiles, damage=damage, color=(200,200,50), acceleration=-0.2, owner=self)
 
     def direction_to_vector(self, angle_degrees):
         angle_radians = math.radians(angle_degrees)
@@ -242,7 +254,7 @@ class Player(Entity):
         pygame.draw.rect(surface, (0, 255, 0), (bar_x, bar_y, filled_width, bar_height))
 
     def die(self):
-        if self in self.dungeon.all_entities:
-            self.dungeon.all_entities.remove(self)
+        self.dungeon.remove_entity(self)
         print(f"Game over! You reached level {self.level}.")
-        exit()
\ No newline at end of file
+        # The game loop ends the run once it sees the player is dead
+        self.dead = True
\ No newline at end of file
@@ -2,6 +2,11 @@ import pygame
 from config import TILE_SIZE_X, TILE_SIZE_Y
 
 class Projectile(pygame.sprite.Sprite):
+    """A single projectile entity.
+
+    In-game projectiles are simulated in bulk by core.systems.projectile_system,
+    which follows this class's update as its reference semantics.
+    """
     def __init__(self, dungeon, x, y, dx, dy, speed=0.2, range_in_tiles=10, damage=2, color=(255, 255, 0), acceleration=0.0, owner=None):
         super().__init__()
         self.dungeon = dungeon
@@ -34,6 +39,7 @@ class Projectile(pygame.sprite.Sprite):
 
         # Update position
         self.rect.topleft = (int(self.x * TILE_SIZE_X), int(self.y * TILE_SIZE_Y))
+        self.dungeon.spatial.update(self)
 
         # Check if out of range
         if self.distance_traveled >= self.range:
@@ -50,8 +56,8 @@ class Projectile(pygame.sprite.Sprite):
             return
 
         # Check collision with entities (e.g. enemies)
-        for ent in self.dungeon.all_entities:
-            if ent is not self and ent.rect.colliderect(self.rect) and hasattr(ent, 'take_damage'):
+        for ent in self.dungeon.entities_in_rect(self.rect):
+            if ent is not self and hasattr(ent, 'take_damage'):
                 # Deal damage to the entity and destroy the projectile
                 if self.owner is not ent:
                     ent.take_damage(self.damage, self.owner)
@@ -59,8 +65,7 @@ class Projectile(pygame.sprite.Sprite):
                     return
 
     def destroy(self):
-        if self in self.dungeon.all_entities:
-            self.dungeon.all_entities.remove(self)
+        self.dungeon.remove_entity(self)
 
     def __emits_light__(self):
         return True
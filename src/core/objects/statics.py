@@ -1,11 +1,12 @@
 import math
 import random
 
+import numpy as np
 import pygame
 from core.objects.entity import Entity
+from core.systems.game_clock import get_ticks
 from config import TILE_SIZE_X, TILE_SIZE_Y
 from core.objects.player import Player
-from core.objects.projectile import Projectile
 import yaml
 import os
 
@@ -35,15 +36,15 @@ class Static(Entity):
             self.toggle = True
         
         if self.toggle:
-            if self.timer is not 0 and self.timer < pygame.time.get_ticks():
+            if self.timer is not 0 and self.timer < get_ticks():
                 self.explode((200,200,50))
                 self.toggle = False
             elif self.timer is 0:
-                self.timer = pygame.time.get_ticks() + self.cooldown
-                self.__color_timer = pygame.time.get_ticks() + 500
+                self.timer = get_ticks() + self.cooldown
+                self.__color_timer = get_ticks() + 500
             else:
-                if self.__color_timer is not 0 and self.__color_timer < pygame.time.get_ticks():
-                    self.__color_timer = pygame.time.get_ticks() + 500 
+                if self.__color_timer is not 0 and self.__color_timer < get_ticks():
+                    self.__color_timer = get_ticks() + 500 
                     self.__color_toggle = not self.__color_toggle
                     
                     if self.__color_toggle:
@@ -51,7 +52,7 @@ class Static(Entity):
                     else:
                         self.image.fill((255, 255, 0))
 
-        if self.effect_timer is not 0 and self.effect_timer < pygame.time.get_ticks():
+        if self.effect_timer is not 0 and self.effect_timer < get_ticks():
             self.explode((255,150,50))
             self.die()
         
@@ -65,8 +66,7 @@ class Static(Entity):
             self.toggle = True
 
     def die(self):
-        if self in self.dungeon.all_entities:
-            self.dungeon.all_entities.remove(self)
+        self.dungeon.remove_entity(self)
         print(f"{self.name} was destroyed.")
 
     def distance_to(self, entity):
@@ -84,13 +84,10 @@ class Static(Entity):
         range_in_tiles = self.area
         damage = self.damage
 
-        for i in range(num_projectiles):
-            angle = start_angle + i * angle_step
-            dx, dy = self.direction_to_vector(angle)
-            proj = Projectile(self.dungeon, self.x, self.y, dx, dy, speed=0.1, range_in_tiles=range_in_tiles, damage=damage, color=color, acceleration=-0.1, owner=self)
-            self.dungeon.all_entities.append(proj)
+        angles = np.radians(start_angle + np.arange(num_projectiles) * angle_step)
+        self.dungeon.projectiles.spawn_many(self.x, self.y, np.cos(angles), np.sin(angles), speed=0.1, range_in_tiles=range_in_tiles, damage=damage, color=color, acceleration=-0.1, owner=self)
 
-        self.effect_timer = pygame.time.get_ticks() + 500
+        self.effect_timer = get_ticks() + 500
     
     def direction_to_vector(self, angle_degrees):
         angle_radians = math.radians(angle_degrees)
@@ -0,0 +1,62 @@
+from config import BOT_FIGHT_RADIUS, BOT_STUCK_FRAMES
+from core.objects.enemy import Enemy
+
+class BotController:
+    """Plays the player without input: fights enemies that come close, otherwise walks to the stairs.
+
+    Routes come from the dungeon's RoomPathfinder. A bot that makes no
+    progress for a while attacks, which clears Statics standing in a corridor.
+    """
+
+    def __init__(self, fight_radius=BOT_FIGHT_RADIUS):
+        self.fight_radius = fight_radius
+        self.path = []
+        self.path_goal = None
+        self.last_position = None
+        self.stuck_frames = 0
+
+    def poll(self, player):
+        position = (player.x, player.y)
+        self.stuck_frames = self.stuck_frames + 1 if position == self.last_position else 0
+        self.last_position = position
+
+        enemy = self.nearest_enemy(player)
+        if enemy is None:
+            move_x, move_y = self.step_towards(player, player.dungeon.goal)
+            return move_x, move_y, self.stuck_frames >= BOT_STUCK_FRAMES
+
+        move_x, move_y = self.step_towards(player, (round(enemy.x), round(enemy.y)))
+        if move_x == 0 and move_y == 0:
+            # Already next to it: press towards the enemy, which turns the player to face it
+            gap_x, gap_y = enemy.x - player.x, enemy.y - player.y
+            move_x, move_y = (1 if gap_x > 0 else -1, 0) if abs(gap_x) >= abs(gap_y) else (0, 1 if gap_y > 0 else -1)
+        return move_x, move_y, True
+
+    def nearest_enemy(self, player):
+        enemies = [ent for ent in player.dungeon.entities_near(player.x, player.y, self.fight_radius)
+                   if isinstance(ent, Enemy) and ent.health > 0]
+        return min(enemies, key=lambda ent: ent.distance_to(player), default=None)
+
+    def step_towards(self, player, goal):
+        """Direction along the path to goal, as fractions of the player's speed."""
+        current = (round(player.x), round(player.y))
+        if goal != self.path_goal or self.stuck_frames == 2 * BOT_STUCK_FRAMES:
+            self.path_goal = goal
+            self.path = player.dungeon.pathfinder.find_path(current, goal) or []
+
+        # A step is done once the player stands exactly on its tile, not just over most of it
+        while self.path and self.path[0] == (player.x, player.y):
+            self.path.pop(0)
+        if not self.path:
+            # Next to the goal, or no route: head straight for it
+            next_x, next_y = goal
+        else:
+            next_x, next_y = self.path[0]
+
+        # One axis at a time, as a diagonal step is undone by a wall on either axis;
+        # while stuck, alternate which axis goes first
+        gap_x, gap_y = next_x - player.x, next_y - player.y
+        horizontal = (abs(gap_x) >= abs(gap_y)) != ((self.stuck_frames // BOT_STUCK_FRAMES) % 2 == 1)
+        if not horizontal and gap_y == 0 or horizontal and gap_x != 0:
+            return max(-1.0, min(1.0, gap_x / player.speed)), 0
+        return 0, max(-1.0, min(1.0, gap_y / player.speed))
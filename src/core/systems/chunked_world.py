@@ -0,0 +1,324 @@
+import os
+import random
+import shutil
+from collections import OrderedDict
+import numpy as np
+
+from config import *
+from core.systems.dungeon import Dungeon
+from core.systems.dungeon_generator import DungeonGenerator, Room
+from core.systems.floor_layout import SPAWN_KINDS, plan_spawns, spawn_requests
+from core.systems.job import wait_until
+from core.systems.spawn_index import SpawnIndex
+
+from core.systems.tile import factory
+from core.objects.player import Player
+from core.objects.stairs import Stairs
+
+class WorldChunk:
+    """One WORLD_CHUNK_SIZE square of a chunked world, in local tile coordinates."""
+
+    def __init__(self, chunk_x, chunk_y, grid, rooms, goal=None):
+        self.chunk_x = chunk_x
+        self.chunk_y = chunk_y
+        self.grid = grid
+        self.rooms = rooms
+        # Local position of the stairs, if the floor's exit lies in this chunk
+        self.goal = goal
+        self.wall_mask = factory.wall_table[grid]
+        self.collide_mask = factory.collide_table[grid]
+        self.dirty = False
+
+
+class ChunkedDungeon(Dungeon):
+    """An endless floor generated lazily, one chunk at a time, around the camera.
+
+    At most WORLD_CHUNK_CACHE chunks are kept in memory, least recently used
+    first out. An evicted chunk is written to disk if it is new or was changed
+    and read back when it is needed again, so memory stays bounded however far
+    the player walks and starting a floor only costs its first chunk.
+
+    Each chunk is a small dungeon of its own, joined to its neighbours by
+    corridors that reach their shared border at the same, seed-derived cell.
+    Entities spawn the first time a chunk is generated. Evicting a chunk
+    writes out every entity standing in it at that moment, wherever it
+    spawned, and reading the chunk back spawns them again where they stood,
+    with the health they had left.
+    """
+
+    def __init__(self, seed=None, chunk_directory=WORLD_CHUNK_DIR, deferred=False, settings=None,
+                 definitions_ready=None):
+        self.chunk_directory = chunk_directory
+        super().__init__(seed=seed, deferred=deferred, settings=settings, definitions_ready=definitions_ready)
+        # Wrapping around would generate chunks on the far side of the world
+        self.wraps = False
+
+    def build(self, seed=None, floor_cache=None, pregenerator=None, definitions_ready=None):
+        # Chunks spawn their entities as they are generated, so every definition is needed first
+        yield from wait_until(definitions_ready)
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+
+        self.chunk_size = WORLD_CHUNK_SIZE
+        self.width = self.height = WORLD_CHUNKS_ACROSS * self.chunk_size
+        self.chunks = OrderedDict()
+        self.saved_chunks = set()
+        # Stored chunks belong to this floor only; a fresh floor starts from a clean directory
+        self.directory = os.path.join(self.chunk_directory, str(self.seed))
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+        # The exit is a few chunks away from the start, in a direction fixed by the seed
+        across = self.rng.randint(0, WORLD_STAIRS_DISTANCE)
+        self.stairs_chunk = (across, WORLD_STAIRS_DISTANCE - across)
+
+        # There is no floor-wide room graph; chasing enemies rely on the flow field
+        self.room_graph = None
+        self.pathfinder = None
+        yield
+
+        entry = self.get_chunk(0, 0)
+        self.rooms = [Room(room.x, room.y, room.width, room.height) for room in entry.rooms]
+
+    def teardown(self):
+        super().teardown()
+        self.chunks = OrderedDict()
+        self.saved_chunks = set()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def array_bytes(self):
+        return sum(chunk.grid.nbytes + chunk.wall_mask.nbytes + chunk.collide_mask.nbytes
+                   for chunk in self.chunks.values())
+
+    def generator_settings(self):
+        """Settings for a single chunk; rooms are kept small enough to fit one."""
+        settings = super().generator_settings()
+        room_max_size = min(self.room_max_size, WORLD_CHUNK_SIZE // 4)
+        settings.update(width=WORLD_CHUNK_SIZE, height=WORLD_CHUNK_SIZE,
+                        room_min_size=min(self.room_min_size, room_max_size), room_max_size=room_max_size)
+        return settings
+
+    def stream(self, camera):
+        """Load the chunks under the camera now and those within WORLD_CHUNK_PRELOAD tiles ahead of time.
+
+        Chunks just outside the view are loaded at most one per call, to spread the work over frames.
+        """
+        view = camera.camera
+        left, top = view.left // TILE_SIZE_X, view.top // TILE_SIZE_Y
+        right, bottom = (view.right - 1) // TILE_SIZE_X, (view.bottom - 1) // TILE_SIZE_Y
+
+        for chunk_x, chunk_y in self.chunks_in(left, top, right, bottom):
+            self.get_chunk(chunk_x, chunk_y)
+
+        margin = WORLD_CHUNK_PRELOAD
+        for chunk_x, chunk_y in self.chunks_in(left - margin, top - margin, right + margin, bottom + margin):
+            if (chunk_x, chunk_y) not in self.chunks:
+                self.get_chunk(chunk_x, chunk_y)
+                break
+
+    def chunks_in(self, left, top, right, bottom):
+        """Keys of the in-bounds chunks overlapping the inclusive tile rectangle."""
+        size, last = self.chunk_size, WORLD_CHUNKS_ACROSS - 1
+        return [(chunk_x, chunk_y)
+                for chunk_y in range(max(top // size, 0), min(bottom // size, last) + 1)
+                for chunk_x in range(max(left // size, 0), min(right // size, last) + 1)]
+
+    def get_chunk(self, chunk_x, chunk_y):
+        """Return a chunk, loading or generating it (and evicting another) if it is not in memory."""
+        key = (chunk_x, chunk_y)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        saved = key in self.saved_chunks
+        chunk = self.load_chunk(chunk_x, chunk_y) if saved else self.generate_chunk(chunk_x, chunk_y)
+        self.chunks[key] = chunk
+        if saved:
+            self.load_entities(chunk_x, chunk_y)
+        if chunk.goal is not None:
+            self.add_stairs(chunk)
+
+        while len(self.chunks) > WORLD_CHUNK_CACHE:
+            self.evict_chunk(*next(iter(self.chunks)))
+        return chunk
+
+    def add_stairs(self, chunk):
+        stairs = Stairs(chunk.chunk_x * self.chunk_size + chunk.goal[0], chunk.chunk_y * self.chunk_size + chunk.goal[1])
+        self.add_entity(stairs)
+        return stairs
+
+    def border_exit(self, chunk_x, chunk_y, side):
+        """Local cell on a chunk's border where the corridor to the neighbour on that side ends.
+
+        Both chunks sharing a border derive the same offset along it from the seed.
+        """
+        size = self.chunk_size
+        if side == "left":
+            return (0, self.border_offset(chunk_x - 1, chunk_y, "vertical"))
+        if side == "right":
+            return (size - 1, self.border_offset(chunk_x, chunk_y, "vertical"))
+        if side == "top":
+            return (self.border_offset(chunk_x, chunk_y - 1, "horizontal"), 0)
+        return (self.border_offset(chunk_x, chunk_y, "horizontal"), size - 1)
+
+    def border_offset(self, chunk_x, chunk_y, orientation):
+        """Offset along the right (vertical) or bottom (horizontal) border of a chunk."""
+        return random.Random(f"{self.seed}:{orientation}:{chunk_x}:{chunk_y}").randint(2, self.chunk_size - 3)
+
+    def generate_chunk(self, chunk_x, chunk_y):
+        last = WORLD_CHUNKS_ACROSS - 1
+        sides = [side for side, present in (("left", chunk_x > 0), ("right", chunk_x < last),
+                                            ("top", chunk_y > 0), ("bottom", chunk_y < last)) if present]
+        exits = [self.border_exit(chunk_x, chunk_y, side) for side in sides]
+
+        rng = random.Random(f"{self.seed}:{chunk_x}:{chunk_y}")
+        generator = DungeonGenerator(rng=rng, exits=exits, **self.generator_settings())
+        grid, rooms = generator.generate()
+        goal = generator.goal if (chunk_x, chunk_y) == self.stairs_chunk else None
+        chunk = WorldChunk(chunk_x, chunk_y, grid, rooms, goal)
+
+        # Spawns are planned as for a whole floor, keeping enemies away from the start in the entry chunk
+        spawn_index = SpawnIndex(~chunk.collide_mask, rng)
+        entry_point = rooms[0].center() if (chunk_x, chunk_y) == (0, 0) else None
+        spawners = {"enemy": self.spawn_enemy, "item": self.spawn_item, "static": self.spawn_static}
+        offset_x, offset_y = chunk_x * self.chunk_size, chunk_y * self.chunk_size
+        for kind, name, x, y in plan_spawns(spawn_index, entry_point, spawn_requests()):
+            spawners[kind](name, offset_x + x, offset_y + y)
+        return chunk
+
+    def chunk_path(self, chunk_x, chunk_y):
+        return os.path.join(self.directory, f"{chunk_x}_{chunk_y}.npz")
+
+    def entities_path(self, chunk_x, chunk_y):
+        return os.path.join(self.directory, f"{chunk_x}_{chunk_y}_entities.npz")
+
+    def save_entities(self, chunk_x, chunk_y, entities):
+        """Write the kind, definition, position and health of spawned entities, see load_entities."""
+        rows = [(SPAWN_KINDS.index(entity.spawned_as[0]), entity.spawned_as[1], entity.x, entity.y,
+                 getattr(entity, "health", 0)) for entity in entities]
+        kinds, names, xs, ys, healths = zip(*rows) if rows else ((), (), (), (), ())
+        np.savez_compressed(
+            self.entities_path(chunk_x, chunk_y),
+            kinds=np.array(kinds, dtype=np.uint8),
+            names=np.array(names, dtype=str),
+            x=np.array(xs, dtype=np.float64),
+            y=np.array(ys, dtype=np.float64),
+            health=np.array(healths, dtype=np.float64),
+        )
+
+    def load_entities(self, chunk_x, chunk_y):
+        """Spawn the entities written out with a chunk again, as they were when it was evicted."""
+        spawners = {"enemy": self.spawn_enemy, "item": self.spawn_item, "static": self.spawn_static}
+        with np.load(self.entities_path(chunk_x, chunk_y), allow_pickle=False) as data:
+            rows = zip(data["kinds"].tolist(), data["names"].tolist(), data["x"].tolist(), data["y"].tolist(),
+                       data["health"].tolist())
+            for kind, name, x, y, health in rows:
+                entity = spawners[SPAWN_KINDS[kind]](name, x, y)
+                if hasattr(entity, "health"):
+                    entity.health = int(health) if health.is_integer() else health
+
+    def load_chunk(self, chunk_x, chunk_y):
+        with np.load(self.chunk_path(chunk_x, chunk_y), allow_pickle=False) as data:
+            rooms = [Room(*room) for room in data["rooms"].tolist()]
+            goal = tuple(data["goal"].tolist()) if data["goal"].size else None
+            return WorldChunk(chunk_x, chunk_y, data["grid"], rooms, goal)
+
+    def evict_chunk(self, chunk_x, chunk_y):
+        """Drop a chunk and its entities from memory, writing the entities out and the tiles if disk does not hold them yet."""
+        chunk = self.chunks.pop((chunk_x, chunk_y))
+        key = (chunk_x, chunk_y)
+        if chunk.dirty or key not in self.saved_chunks:
+            os.makedirs(self.directory, exist_ok=True)
+            np.savez_compressed(
+                self.chunk_path(chunk_x, chunk_y),
+                grid=chunk.grid,
+                rooms=np.array([(r.x, r.y, r.width, r.height) for r in chunk.rooms], dtype=np.int32).reshape(-1, 4),
+                goal=np.array(chunk.goal if chunk.goal is not None else (), dtype=np.int32),
+            )
+            self.saved_chunks.add(key)
+
+        left, top = chunk_x * self.chunk_size, chunk_y * self.chunk_size
+        right, bottom = left + self.chunk_size, top + self.chunk_size
+        # What stands in the chunk now leaves with it, be it spawned here or elsewhere; the player never
+        # does, and the stairs come back from the chunk's goal
+        leaving = [entity for entity in self.spatial.query_cells(left, top, right - 1, bottom - 1)
+                   if left <= entity.x < right and top <= entity.y < bottom and not isinstance(entity, Player)]
+        self.save_entities(chunk_x, chunk_y, [entity for entity in leaving if hasattr(entity, "spawned_as")])
+        for entity in leaving:
+            self.remove_entity(entity)
+
+        for listener in self.unload_listeners:
+            listener(left, top, right, bottom)
+
+    def window(self, attribute, left, top, right, bottom):
+        """Assemble the in-bounds rectangle [left, right) x [top, bottom) of a per-chunk array."""
+        size = self.chunk_size
+        result = None
+        for chunk_x, chunk_y in self.chunks_in(left, top, right - 1, bottom - 1):
+            array = getattr(self.get_chunk(chunk_x, chunk_y), attribute)
+            if result is None:
+                result = np.empty((bottom - top, right - left), dtype=array.dtype)
+            chunk_left, chunk_top = chunk_x * size, chunk_y * size
+            x0, y0 = max(left, chunk_left), max(top, chunk_top)
+            x1, y1 = min(right, chunk_left + size), min(bottom, chunk_top + size)
+            result[y0 - top:y1 - top, x0 - left:x1 - left] = array[y0 - chunk_top:y1 - chunk_top, x0 - chunk_left:x1 - chunk_left]
+        return result
+
+    def grid_window(self, left, top, right, bottom):
+        return self.window("grid", left, top, right, bottom)
+
+    def wall_window(self, left, top, right, bottom):
+        return self.window("wall_mask", left, top, right, bottom)
+
+    def chunk_of(self, tile_x, tile_y):
+        """Return the chunk holding a tile and the tile's local coordinates."""
+        size = self.chunk_size
+        return self.get_chunk(tile_x // size, tile_y // size), tile_x % size, tile_y % size
+
+    def tile_type_at(self, tile_x, tile_y):
+        chunk, x, y = self.chunk_of(tile_x, tile_y)
+        return factory.tile_names[chunk.grid[y, x]]
+
+    def set_tile(self, tile_x, tile_y, tile_type):
+        tile_id = factory.tile_ids[tile_type]
+        chunk, x, y = self.chunk_of(tile_x, tile_y)
+        chunk.grid[y, x] = tile_id
+        chunk.wall_mask[y, x] = factory.wall_table[tile_id]
+        chunk.collide_mask[y, x] = factory.collide_table[tile_id]
+        chunk.dirty = True
+
+        for listener in self.tile_listeners:
+            listener(tile_x, tile_y)
+
+    def is_blocked_tile(self, tile_x, tile_y):
+        if 0 <= tile_x < self.width and 0 <= tile_y < self.height:
+            chunk, x, y = self.chunk_of(tile_x, tile_y)
+            return bool(chunk.wall_mask[y, x])
+        return True  # Out of bounds is blocked
+
+    def blocked_tiles(self, tile_xs, tile_ys):
+        tile_xs = np.asarray(tile_xs).astype(np.intp)
+        tile_ys = np.asarray(tile_ys).astype(np.intp)
+        inside = (tile_xs >= 0) & (tile_xs < self.width) & (tile_ys >= 0) & (tile_ys < self.height)
+        blocked = np.ones(tile_xs.shape, dtype=bool)  # Out of bounds is blocked
+
+        # One lookup per chunk the positions fall into
+        size = self.chunk_size
+        keys = (tile_ys // size) * WORLD_CHUNKS_ACROSS + tile_xs // size
+        for key in np.unique(keys[inside]):
+            selected = inside & (keys == key)
+            chunk = self.get_chunk(int(key % WORLD_CHUNKS_ACROSS), int(key // WORLD_CHUNKS_ACROSS))
+            blocked[selected] = chunk.wall_mask[tile_ys[selected] % size, tile_xs[selected] % size]
+        return blocked
+
+    def find_valid_spawn_points(self):
+        """Walkable tiles of the chunks in memory."""
+        points = []
+        for (chunk_x, chunk_y), chunk in self.chunks.items():
+            offset_x, offset_y = chunk_x * self.chunk_size, chunk_y * self.chunk_size
+            ys, xs = np.nonzero(~chunk.collide_mask)
+            points += list(zip((xs + offset_x).tolist(), (ys + offset_y).tolist()))
+        return points
+
+    def get_random_spawn_point(self):
+        return self.rng.choice(self.find_valid_spawn_points())
@@ -1,78 +1,215 @@
 import os
-import pygame
 import random
+import numpy as np
+import pygame
 
 import yaml
 from config import *
-from core.systems.dungeon_generator import DungeonGenerator
+from core.systems.floor_cache import cached_floor_layout_steps
+from core.systems.job import run_job, wait_until
+from core.systems.spatial_hash import SpatialHash
+from core.systems.spawn_index import SpawnIndex
+from core.systems.projectile_system import ProjectileSystem
+from core.systems.flow_field import FlowField
+from core.systems.room_graph import RoomGraph, RoomPathfinder
 
 from core.systems.tile import factory
 from core.objects.enemy import enemy_factory
 from core.objects.item import item_factory
 from core.objects.statics import static_factory
+from core.objects.stairs import Stairs
+
+def generator_settings_of(definition):
+    """The generator_settings of a Dungeon built from one entry of a dungeon definition."""
+    scalable = definition.get('scalable')
+    if scalable is None:
+        # Classic placement and its spanning tree over all room pairs get slow with many rooms
+        scalable = definition['rooms'] >= SCALABLE_ROOM_COUNT
+    return {
+        "width": definition['width'],
+        "height": definition['height'],
+        "num_rooms": definition['rooms'],
+        "room_min_size": definition['room_min_size'],
+        "room_max_size": definition['room_max_size'],
+        "wiggly": definition['wiggly'],
+        "smoothing": definition.get('smoothing', 1),
+        "scalable": bool(scalable),
+    }
+
 
 class Dungeon:
-    def __init__(self, num_rooms=5, room_min_size=5, room_max_size=10, width=DUNGEON_WIDTH, height=DUNGEON_HEIGHT):
+    def __init__(self, num_rooms=5, room_min_size=5, room_max_size=10, width=DUNGEON_WIDTH, height=DUNGEON_HEIGHT,
+                 seed=None, floor_cache=None, pregenerator=None, deferred=False, settings_file=None,
+                 settings=None, definitions_ready=None):
         self.width = width
         self.height = height
-        self.tiles = pygame.sprite.Group()
         self.all_entities = []
+        # Spatial index over all_entities, kept current by add/remove_entity and Entity.move
+        self.spatial = SpatialHash()
+        # Projectiles are simulated in bulk rather than as entities
+        self.projectiles = ProjectileSystem(self)
+        # Callbacks taking (tile_x, tile_y), notified whenever a tile is replaced
+        self.tile_listeners = []
+        # Callbacks taking (left, top, right, bottom) tile bounds of an area dropped from memory
+        self.unload_listeners = []
+        # Distance field towards the player, shared by all chasing enemies
+        self.flow_field = FlowField(self)
+        # Entities stepping off one edge come back in at the opposite one
+        self.wraps = True
         
         self.num_rooms = 5
         self.room_min_size = 5
         self.room_max_size = 10
 
         self.wiggly = 0.2
+        self.smoothing = 1
+        self.scalable = False
 
         self.theme = "None"
         self.name = "Dungeon"
 
-        self.load_dungeon_settings(os.path.abspath("src/config/dungeon.yaml"))
+        # Settings handed over by the game director take the place of the settings file
+        if settings is not None:
+            self.apply_dungeon_settings(settings)
+        else:
+            self.load_dungeon_settings(settings_file or os.path.abspath("src/config/dungeon.yaml"))
+
+        # The floor is built by a resumable job; a deferred dungeon leaves running it to the caller
+        self.build_job = self.build(seed, floor_cache, pregenerator, definitions_ready)
+        if not deferred:
+            run_job(self.build_job)
+
+    def build(self, seed=None, floor_cache=None, pregenerator=None, definitions_ready=None):
+        """Build the floor as a generator yielding after every bounded step, see TimeSlicedJob.
+
+        definitions_ready, if given, is polled until the enemy, item and static
+        definitions have arrived; only the tile definitions are needed to start,
+        unless a layout pre-generated for these dungeon settings is fitted.
+        """
+        layout = None
+        if pregenerator is not None and pregenerator.matches(self.generator_settings()):
+            # A pre-generated layout is fitted to the final definitions, so all of them are needed
+            while not pregenerator.ready():
+                yield
+            yield from wait_until(definitions_ready)
+            # A layout generated ahead of time brings its own seed
+            layout = pregenerator.take(self.generator_settings())
+            if layout is not None:
+                seed = layout.seed
+        elif pregenerator is not None:
+            # Generated for other dungeon settings; the floor is generated below, starting from the tiles alone
+            pregenerator.discard()
+        # Every random choice made while building the floor derives from this seed
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+
+        if layout is None:
+            layout = yield from cached_floor_layout_steps(self.generator_settings(), self.seed, floor_cache,
+                                                          definitions_ready)
+        yield from self.apply_layout(layout)
+
+    def generator_settings(self):
+        """The dungeon settings that determine the generated layout."""
+        return {
+            "width": self.width,
+            "height": self.height,
+            "num_rooms": self.num_rooms,
+            "room_min_size": self.room_min_size,
+            "room_max_size": self.room_max_size,
+            "wiggly": self.wiggly,
+            "smoothing": self.smoothing,
+            "scalable": self.scalable,
+        }
+
+    def apply_layout(self, layout):
+        """Build the floor from a generated or cached layout and spawn its entities, in steps."""
+        # The layout holds a finished tile-id array; per-type data lives in the factory's
+        # flyweight tables and Tile objects are only created on demand by get_tile
+        self.grid = layout.grid
+        self.rooms = layout.rooms
+        self.build_masks()
+        # Room-level topology for long-range paths, see RoomPathfinder
+        self.room_graph = RoomGraph(layout.rooms, layout.corridors, self.width, self.height)
+        self.pathfinder = RoomPathfinder(self, self.room_graph)
+        self.spawn_index = SpawnIndex(~self.collide_mask, self.rng)
+        yield
+
+        self.goal = layout.goal
+        self.add_entity(Stairs(*layout.goal))
+        yield from self.populate(layout.spawns)
 
-        generator = DungeonGenerator(self, width=self.width, height=self.height,
-                                     num_rooms=self.num_rooms, room_min_size=self.room_min_size,
-                                     room_max_size=self.room_max_size, wiggly=self.wiggly)
-        self.grid, self.rooms = generator.generate()
+    def populate(self, spawns):
+        """Spawn Enemies, Items, and Statics at the positions planned by the layout, a batch per step."""
+        spawners = {"enemy": self.spawn_enemy, "item": self.spawn_item, "static": self.spawn_static}
+        for start in range(0, len(spawns), FLOOR_BUILD_SPAWNS):
+            for kind, name, x, y in spawns[start:start + FLOOR_BUILD_SPAWNS]:
+                spawners[kind](name, x, y)
+            yield
 
-        self.convert_grid_to_tiles()
+    def build_masks(self):
+        """Build the per-floor boolean wall and collide masks, indexed [y, x]."""
+        self.wall_mask = factory.wall_table[self.grid]
+        self.collide_mask = factory.collide_table[self.grid]
 
-        # Spawn Enemies, Items, and Statics
-        for enemy_def in enemy_factory.enemy_definitions:
-            for _ in range(enemy_def.get('amount', 0)):
-                self.spawn_enemy(enemy_def['type'])
+    def teardown(self):
+        """Release everything the floor holds once the game has moved on to another one.
 
-        for item_def in item_factory.item_definitions:
-            for _ in range(item_def.get('amount', 0)):
-                self.spawn_item(item_def['name'])
+        Entities leave their sprite groups and stop referring to the floor, and
+        the tile instances created for it are dropped from the factory.
+        """
+        for entity in self.all_entities:
+            entity.kill()
+            # The player has already moved on to the next floor
+            if getattr(entity, "dungeon", None) is self:
+                entity.dungeon = None
+        self.all_entities = []
+        self.spatial.clear()
+        self.projectiles.clear()
+        self.tile_listeners = []
+        self.unload_listeners = []
+        factory.release_instances()
+
+    def array_bytes(self):
+        """Bytes held by the floor's per-tile arrays."""
+        arrays = [self.grid, self.wall_mask, self.collide_mask]
+        if self.room_graph is not None:
+            arrays.append(self.room_graph.room_ids)
+        return sum(array.nbytes for array in arrays)
+
+    def grid_window(self, left, top, right, bottom):
+        """Tile ids of the in-bounds rectangle [left, right) x [top, bottom), indexed [y, x]."""
+        return self.grid[top:bottom, left:right]
+
+    def wall_window(self, left, top, right, bottom):
+        """Wall mask of the in-bounds rectangle [left, right) x [top, bottom), indexed [y, x]."""
+        return self.wall_mask[top:bottom, left:right]
+
+    def stream(self, camera):
+        """Make sure the tiles around the camera are in memory; the whole floor always is."""
+        pass
+
+    def get_tile(self, tile_x, tile_y):
+        """Create a Tile object for a single cell."""
+        return factory.create_tile(self.tile_type_at(tile_x, tile_y), tile_x, tile_y)
 
-        for static_def in static_factory.enemy_definitions:
-            for _ in range(static_def.get('amount', 0)):
-                self.spawn_static(static_def['type'])
+    def tile_type_at(self, tile_x, tile_y):
+        return factory.tile_names[self.grid[tile_y, tile_x]]
 
-    def convert_grid_to_tiles(self):
-        for y in range(self.height):
-            for x in range(self.width):
-                tile_type = self.grid[y][x]
-                if tile_type:  # If not None
-                    tile = factory.create_tile(tile_type, x, y)
-                    self.tiles.add(tile)
-                    self.grid[y][x] = tile  # Replace string with actual Tile object
+    def set_tile(self, tile_x, tile_y, tile_type):
+        """Replace the tile at a position and notify listeners such as render caches."""
+        tile_id = factory.tile_ids[tile_type]
+        self.grid[tile_y, tile_x] = tile_id
+        self.wall_mask[tile_y, tile_x] = factory.wall_table[tile_id]
+        self.collide_mask[tile_y, tile_x] = factory.collide_table[tile_id]
 
-    def get_tiles(self):
-        return self.tiles
+        for listener in self.tile_listeners:
+            listener(tile_x, tile_y)
 
     def find_valid_spawn_points(self):
-        valid_points = []
-        for y in range(self.height):
-            for x in range(self.width):
-                tile = self.grid[y][x]
-                if tile and getattr(tile, 'collide', None) == 0:
-                    valid_points.append((x, y))
-        return valid_points
+        return self.spawn_index.points()
 
     def get_random_spawn_point(self):
-        valid_points = self.find_valid_spawn_points()
-        return random.choice(valid_points)
+        return self.spawn_index.random_point()
     
     def find_spawn_point(self):
         entry_room = self.rooms[0]
@@ -81,10 +218,18 @@ class Dungeon:
     def is_blocked_tile(self, tile_x, tile_y):
         """Check if a tile is blocked (e.g., a wall)."""
         if 0 <= tile_x < self.width and 0 <= tile_y < self.height:
-            tile = self.grid[tile_y][tile_x]
-            return tile and tile.wall == 1
+            return bool(self.wall_mask[tile_y, tile_x])
         return True  # Out of bounds is blocked
 
+    def blocked_tiles(self, tile_xs, tile_ys):
+        """Bulk is_blocked_tile: return a bool array telling which of N positions are blocked."""
+        tile_xs = np.asarray(tile_xs).astype(np.intp)
+        tile_ys = np.asarray(tile_ys).astype(np.intp)
+        inside = (tile_xs >= 0) & (tile_xs < self.width) & (tile_ys >= 0) & (tile_ys < self.height)
+        blocked = np.ones(tile_xs.shape, dtype=bool)  # Out of bounds is blocked
+        blocked[inside] = self.wall_mask[tile_ys[inside], tile_xs[inside]]
+        return blocked
+
     def check_collision(self, entity):
         # Determine the range of tiles the entity's rect covers
         left_tile = entity.rect.left // TILE_SIZE_X
@@ -93,35 +238,50 @@ class Dungeon:
         top_tile = entity.rect.top // TILE_SIZE_Y
         bottom_tile = (entity.rect.bottom - 1) // TILE_SIZE_Y
 
-        for ty in range(top_tile, bottom_tile + 1):
-            for tx in range(left_tile, right_tile + 1):
-                if 0 <= tx < self.width and 0 <= ty < self.height:
-                    tile = self.grid[ty][tx]
-                    if tile and tile.wall == 1:
-                        return True
-                else:
-                    return True  # Out of bounds considered blocked
+        if left_tile < 0 or top_tile < 0 or right_tile >= self.width or bottom_tile >= self.height:
+            return True  # Out of bounds considered blocked
 
-        return False
+        return bool(self.wall_window(left_tile, top_tile, right_tile + 1, bottom_tile + 1).any())
     
     def add_entity(self, entity):
         self.all_entities.append(entity)
+        self.spatial.insert(entity)
+
+    def remove_entity(self, entity):
+        if entity in self.spatial:
+            self.spatial.remove(entity)
+            self.all_entities.remove(entity)
+
+    def entities_near(self, x, y, radius):
+        """Return entities within a Manhattan distance of a tile position."""
+        return self.spatial.query_radius(x, y, radius)
 
-    def spawn_enemy(self, enemy_name):
-        x, y = self.get_random_spawn_point()
+    def entities_in_rect(self, rect):
+        """Return entities whose rect overlaps a rect given in pixels."""
+        return self.spatial.query_rect(rect)
+
+    def spawn_enemy(self, enemy_name, x=None, y=None):
+        if x is None or y is None:
+            x, y = self.get_random_spawn_point()
         entity = enemy_factory.create_enemy(enemy_name, x, y, self)
+        # The spawner and definition it came from, to spawn it again after it was written to disk
+        entity.spawned_as = ("enemy", enemy_name)
         self.add_entity(entity)
         return entity
 
-    def spawn_item(self, item_name):
-        x, y = self.get_random_spawn_point()
+    def spawn_item(self, item_name, x=None, y=None):
+        if x is None or y is None:
+            x, y = self.get_random_spawn_point()
         item_entity = item_factory.create_item(item_name, x, y, self)
+        item_entity.spawned_as = ("item", item_name)
         self.add_entity(item_entity)
         return item_entity
     
-    def spawn_static(self, static_type):
-        x, y = self.get_random_spawn_point()
+    def spawn_static(self, static_type, x=None, y=None):
+        if x is None or y is None:
+            x, y = self.get_random_spawn_point()
         static_entity = static_factory.create_static(static_type, x, y, self)
+        static_entity.spawned_as = ("static", static_type)
         print("Spawning static entity at", x, y)
         self.add_entity(static_entity)
         return static_entity
@@ -130,13 +290,13 @@ class Dungeon:
         with open(file_path, 'r') as file:
             item_data = yaml.safe_load(file)
             if 'dungeon' in item_data:
-                self.rooms = item_data['dungeon'][0]['rooms']
-                self.room_min_size = item_data['dungeon'][0]['room_min_size']
-                self.room_max_size = item_data['dungeon'][0]['room_max_size']
-                self.width = item_data['dungeon'][0]['width']
-                self.height = item_data['dungeon'][0]['height']
-                self.theme = item_data['dungeon'][0]['theme']
-                self.wiggly = item_data['dungeon'][0]['wiggly']
-                self.name = item_data['dungeon'][0]['name']
+                self.apply_dungeon_settings(item_data['dungeon'][0])
             else:
-                raise ValueError("No 'items' key found in YAML.")
\ No newline at end of file
+                raise ValueError("No 'items' key found in YAML.")
+
+    def apply_dungeon_settings(self, settings):
+        """Take the settings of one entry of a dungeon definition."""
+        for key, value in generator_settings_of(settings).items():
+            setattr(self, key, value)
+        self.theme = settings['theme']
+        self.name = settings['name']
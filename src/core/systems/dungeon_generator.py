@@ -1,7 +1,7 @@
 import random
 import math
-from config import DUNGEON_WIDTH, DUNGEON_HEIGHT
-from core.objects.stairs import Stairs
+import numpy as np
+from config import DUNGEON_WIDTH, DUNGEON_HEIGHT, FLOOR_BUILD_CELLS, ROOM_PLACEMENT_RETRIES, ROOM_GRAPH_NEIGHBOURS
 from core.systems.tile import factory
 
 class Room:
@@ -22,114 +22,267 @@ class Room:
             self.y + self.height > other.y
         )
 
+class RoomIndex:
+    """Bucket grid over placed rooms, so an overlap test only looks at rooms nearby."""
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.buckets = {}
+
+    def cells(self, room):
+        size = self.cell_size
+        for cell_y in range(room.y // size, (room.y + room.height - 1) // size + 1):
+            for cell_x in range(room.x // size, (room.x + room.width - 1) // size + 1):
+                yield cell_x, cell_y
+
+    def insert(self, room):
+        for cell in self.cells(room):
+            self.buckets.setdefault(cell, []).append(room)
+
+    def intersects(self, room):
+        return any(other.intersects(room) for cell in self.cells(room) for other in self.buckets.get(cell, ()))
+
+
+class DisjointSet:
+    """Union-find with path compression and union by size."""
+
+    def __init__(self, count):
+        self.parent = list(range(count))
+        self.size = [1] * count
+        self.count = count
+
+    def find(self, v):
+        root = v
+        while root != self.parent[root]:
+            root = self.parent[root]
+        while v != root:
+            self.parent[v], v = root, self.parent[v]
+        return root
+
+    def union(self, a, b):
+        """Merge the sets of a and b; return False if they were already one set."""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        self.count -= 1
+        return True
+
+
+def nearest_neighbour_edges(centers, k):
+    """Return (distance, i, j) edges from every center to its k nearest others, found through a bucket grid."""
+    points = np.array(centers, dtype=float)
+    count = len(points)
+    k = min(k, count - 1)
+    # Buckets hold about one center each on average
+    extent = points.max(axis=0) - points.min(axis=0) + 1
+    cell_size = max(1.0, math.sqrt(extent[0] * extent[1] / count))
+    cells = np.floor((points - points.min(axis=0)) / cell_size).astype(int)
+    buckets = {}
+    for index, (cell_x, cell_y) in enumerate(cells.tolist()):
+        buckets.setdefault((cell_x, cell_y), []).append(index)
+    max_ring = int(cells.max()) + 1
+
+    edges = set()
+    for i, (cell_x, cell_y) in enumerate(cells.tolist()):
+        ring = 1
+        while True:
+            candidates = [j for dy in range(-ring, ring + 1) for dx in range(-ring, ring + 1)
+                          for j in buckets.get((cell_x + dx, cell_y + dy), ()) if j != i]
+            if len(candidates) >= k:
+                distances = np.hypot(*(points[candidates] - points[i]).T)
+                nearest = np.argsort(distances, kind="stable")[:k]
+                # Every center within ring cells has been seen, so the k found are the true nearest
+                if distances[nearest[-1]] <= ring * cell_size or ring >= max_ring:
+                    break
+            elif ring >= max_ring:
+                distances = np.hypot(*(points[candidates] - points[i]).T)
+                nearest = np.argsort(distances, kind="stable")
+                break
+            ring += 1
+        for n in nearest:
+            j = candidates[n]
+            edges.add((float(distances[n]), min(i, j), max(i, j)))
+    return sorted(edges)
+
+
+# The 8 neighbours of a cell as (dx, dy), in the order find_nearest_floor scans them
+NEIGHBOUR_OFFSETS = [(i, j) for j in range(-1, 2) for i in range(-1, 2) if (i, j) != (0, 0)]
+
 class DungeonGenerator:
-    def __init__(self, dungeon, width=DUNGEON_WIDTH, height=DUNGEON_HEIGHT,
-                 num_rooms=5, room_min_size=5, room_max_size=20, wiggly=0.2):
+    def __init__(self, width=DUNGEON_WIDTH, height=DUNGEON_HEIGHT,
+                 num_rooms=5, room_min_size=5, room_max_size=20, wiggly=0.2, smoothing=1, scalable=False,
+                 exits=(), rng=None):
         self.width = width
         self.height = height
         self.num_rooms = num_rooms
         self.room_min_size = room_min_size
         self.room_max_size = room_max_size
         self.rooms = []
+        # (i, j) pairs of rooms joined by a carved corridor, kept as the floor's room graph
+        self.corridors = []
         self.grid = None
-        self.dungeon = dungeon
+        self.goal = None
         self.wiggly = wiggly
-        self.wall_list = []
-        for tile_def in factory.tile_classes:
-            if factory.tile_properties[tile_def]['wall'] == 1:
-                self.wall_list.append(tile_def)
-
-        self.floor_list = []
-        for tile_def in factory.tile_classes:
-            if factory.tile_properties[tile_def]['wall'] == 0:
-                self.floor_list.append(tile_def)
-
-        
-        self.wall_weights = []
-        for tile_def in factory.tile_classes:
-            if factory.tile_properties[tile_def]['wall'] == 1:
-                self.wall_weights.append(factory.tile_properties[tile_def]['rarity'])
-
-        self.floor_weights = []
-        for tile_def in factory.tile_classes:
-            if factory.tile_properties[tile_def]['wall'] == 0:
-                self.floor_weights.append(factory.tile_properties[tile_def]['rarity'])
+        self.smoothing = smoothing
+        # Scalable mode retries room placement against a spatial index and joins rooms
+        # over a nearest-neighbour graph, for floors with thousands of rooms
+        self.scalable = scalable
+        self.room_index = RoomIndex(room_max_size + 1)
+        # Border cells (x, y) a corridor must reach, where a neighbouring area connects
+        self.exits = list(exits)
+        # All randomness comes from rng so a seeded generator reproduces the same floor
+        self.rng = rng if rng is not None else random.Random()
+        self.np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        # Tile ids and lookup tables, indexed by id, from the tile factory
+        self.is_wall = factory.wall_table
+        self.is_floor = factory.floor_table
+        self.wall_ids = np.flatnonzero(self.is_wall)
+        self.floor_ids = np.flatnonzero(self.is_floor)
+        self.wall_weights = factory.rarity_table[self.wall_ids]
+        self.floor_weights = factory.rarity_table[self.floor_ids]
 
     def generate(self):
-        self.grid = [[random.choices(self.wall_list, self.wall_weights, k=1)[0] for _ in range(self.width)] for _ in range(self.height)]
+        """Generate the floor as a (height, width) array of tile ids, plus its rooms."""
+        for _ in self.generate_steps():
+            pass
+        return self.grid, self.rooms
+
+    def generate_steps(self):
+        """Generate the floor as a resumable job, yielding after every bounded step.
+
+        A step is one band of rows, one room or one corridor, so a caller can
+        spread generation over several frames. The result does not depend on
+        how the steps are scheduled.
+        """
+        # Fill the whole grid with weighted wall types, a band of rows at a time
+        probabilities = self.wall_weights / self.wall_weights.sum()
+        self.grid = np.empty((self.height, self.width), dtype=factory.id_dtype())
+        for top, bottom in self.row_bands():
+            self.grid[top:bottom] = self.np_rng.choice(self.wall_ids, size=(bottom - top, self.width), p=probabilities)
+            yield
+
+        for _ in range(self.room_attempts()):
+            if len(self.rooms) >= self.num_rooms:
+                break
+            self.place_room()
+            yield
+
+        self.corridors = self.mst_edges()
+        for i, j in self.corridors:
+            self.carve_corridor(*self.rooms[i].center(), *self.rooms[j].center())
+            yield
 
-        self.generate_rooms()
-        self.connect_rooms_mst()
-        self.soften_edges()
+        for exit_x, exit_y in self.exits:
+            self.carve_corridor(*self.nearest_room_center(exit_x, exit_y), exit_x, exit_y)
+            yield
+
+        yield from self.soften_edges_steps()
         self.place_goal()
 
-        return self.grid, self.rooms
+    def row_bands(self):
+        """Split the rows into (top, bottom) bands of about FLOOR_BUILD_CELLS cells each."""
+        rows = max(1, FLOOR_BUILD_CELLS // self.width)
+        return [(top, min(top + rows, self.height)) for top in range(0, self.height, rows)]
 
-    def generate_rooms(self):
-        for _ in range(self.num_rooms):
-            w = random.randint(self.room_min_size, self.room_max_size)
-            h = random.randint(self.room_min_size, self.room_max_size)
-            x = random.randint(1, self.width - w - 1)
-            y = random.randint(1, self.height - h - 1)
+    def random_floor(self):
+        """Pick a floor tile id by rarity weight."""
+        return int(self.rng.choices(self.floor_ids, self.floor_weights, k=1)[0])
 
-            new_room = Room(x, y, w, h)
-            if any(new_room.intersects(r) for r in self.rooms):
-                continue
+    def generate_rooms(self):
+        for _ in range(self.room_attempts()):
+            if len(self.rooms) >= self.num_rooms:
+                break
+            self.place_room()
+
+    def room_attempts(self):
+        """Placement attempts allowed; the classic mode makes one per requested room."""
+        return self.num_rooms * ROOM_PLACEMENT_RETRIES if self.scalable else self.num_rooms
+
+    def place_room(self):
+        """Try to place one random room, giving up if it overlaps an existing one."""
+        w = self.rng.randint(self.room_min_size, self.room_max_size)
+        h = self.rng.randint(self.room_min_size, self.room_max_size)
+        x = self.rng.randint(1, self.width - w - 1)
+        y = self.rng.randint(1, self.height - h - 1)
+
+        new_room = Room(x, y, w, h)
+        if self.scalable:
+            if self.room_index.intersects(new_room):
+                return
+            self.room_index.insert(new_room)
+        elif any(new_room.intersects(r) for r in self.rooms):
+            return
 
-            self.rooms.append(new_room)
-            self.create_room_tiles(new_room)
+        self.rooms.append(new_room)
+        self.create_room_tiles(new_room)
 
     def create_room_tiles(self, room):
-        tile = random.choices(self.floor_list, self.floor_weights, k=1)[0]
-        for ry in range(room.y, room.y + room.height):
-            for rx in range(room.x, room.x + room.width):
-                self.grid[ry][rx] = tile
+        self.grid[room.y:room.y + room.height, room.x:room.x + room.width] = self.random_floor()
 
     def connect_rooms_mst(self):
+        self.corridors = self.mst_edges()
+        for i, j in self.corridors:
+            self.carve_corridor(*self.rooms[i].center(), *self.rooms[j].center())
+
+    def nearest_room_center(self, tile_x, tile_y):
+        """Center of the room closest to a tile, or the first exit when there are no rooms."""
+        if not self.rooms:
+            return self.exits[0]
+        return min((room.center() for room in self.rooms),
+                   key=lambda center: abs(center[0] - tile_x) + abs(center[1] - tile_y))
+
+    def mst_edges(self):
+        """Return the (i, j) room pairs of a minimum spanning tree over the room centers."""
         if len(self.rooms) <= 1:
-            return
+            return []
 
         centers = [r.center() for r in self.rooms]
 
-        edges = []
-        for i in range(len(centers)):
-            for j in range(i+1, len(centers)):
-                x1, y1 = centers[i]
-                x2, y2 = centers[j]
-                dist = math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
-                edges.append((dist, i, j))
-        edges.sort(key=lambda e: e[0])
-
-        parent = list(range(len(centers)))
-        def find_set(v):
-            while v != parent[v]:
-                v = parent[v]
-            return v
-        def union_set(a, b):
-            a = find_set(a)
-            b = find_set(b)
-            if a != b:
-                parent[b] = a
-
+        if self.scalable:
+            edges = nearest_neighbour_edges(centers, ROOM_GRAPH_NEIGHBOURS)
+        else:
+            edges = []
+            for i in range(len(centers)):
+                for j in range(i+1, len(centers)):
+                    x1, y1 = centers[i]
+                    x2, y2 = centers[j]
+                    dist = math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+                    edges.append((dist, i, j))
+            edges.sort(key=lambda e: e[0])
+
+        sets = DisjointSet(len(centers))
         mst_edges = []
         for dist, i, j in edges:
-            if find_set(i) != find_set(j):
-                union_set(i, j)
+            if sets.union(i, j):
                 mst_edges.append((i, j))
-                if len(mst_edges) == len(centers)-1:
+                if sets.count == 1:
                     break
 
-        for (i, j) in mst_edges:
-            x1, y1 = centers[i]
-            x2, y2 = centers[j]
-            self.carve_corridor(x1, y1, x2, y2)
+        # A nearest-neighbour graph can split into clusters; bridge them by their closest pair
+        points = np.array(centers, dtype=float)
+        while sets.count > 1:
+            roots = np.array([sets.find(i) for i in range(len(centers))])
+            labels, sizes = np.unique(roots, return_counts=True)
+            inside = roots == labels[np.argmin(sizes)]
+            members, others = np.flatnonzero(inside), np.flatnonzero(~inside)
+            distances = np.hypot(*(points[members][:, None] - points[others][None]).transpose(2, 0, 1))
+            a, b = np.unravel_index(np.argmin(distances), distances.shape)
+            i, j = int(members[a]), int(others[b])
+            sets.union(i, j)
+            mst_edges.append((min(i, j), max(i, j)))
+
+        return mst_edges
 
     def carve_corridor(self, x1, y1, x2, y2):
         # Random walk approach to create a corridor with slight randomness.
         x, y = x1, y1
         nearby_floor = self.find_nearest_floor(x, y)
-        tile_to_place = nearby_floor if nearby_floor else random.choices(self.floor_list, self.floor_weights, k=1)[0]
-        self.grid[y][x] = nearby_floor
+        tile_to_place = nearby_floor if nearby_floor is not None else self.random_floor()
+        self.grid[y, x] = tile_to_place
 
         # Define how "wiggly" the corridor is, probability of deviating
         wiggle_chance = self.wiggly
@@ -151,104 +304,122 @@ class DungeonGenerator:
                 step_y = 1 if dy > 0 else -1
 
             # With some probability, deviate from the chosen direction
-            if random.random() < wiggle_chance:
+            if self.rng.random() < wiggle_chance:
                 # Attempt a perpendicular move
                 if horizontal_priority:
                     # Instead of moving horizontally, try up or down
                     step_x = 0
-                    step_y = random.choice([1, -1])
+                    step_y = self.rng.choice([1, -1])
                 else:
                     # Instead of moving vertically, try left or right
                     step_y = 0
-                    step_x = random.choice([1, -1])
+                    step_x = self.rng.choice([1, -1])
 
             # Make sure we don't go out of bounds
             nx, ny = x + step_x, y + step_y
             if 0 <= nx < self.width and 0 <= ny < self.height:
                 x, y = nx, ny
                 nearby_floor = self.find_nearest_floor(x, y)
-                tile_to_place = nearby_floor if nearby_floor else random.choices(self.floor_list, self.floor_weights, k=1)[0]
-                self.grid[y][x] = tile_to_place
+                tile_to_place = nearby_floor if nearby_floor is not None else self.random_floor()
+                self.grid[y, x] = tile_to_place
 
                 # Occasionally carve adjacent tiles to break the straight line
-                if random.random() < 0.1:
+                if self.rng.random() < 0.1:
                     # Try carving a side tile
                     for side_x, side_y in [(1,0),(-1,0),(0,1),(0,-1)]:
                         sx, sy = x + side_x, y + side_y
                         if 0 <= sx < self.width and 0 <= sy < self.height:
                             # With a small chance, carve a neighboring tile
-                            if random.random() < 0.3:
+                            if self.rng.random() < 0.3:
                                 nearby_floor = self.find_nearest_floor(x, y)
-                                tile_to_place = nearby_floor if nearby_floor else random.choices(self.floor_list, self.floor_weights, k=1)[0]
-                                self.grid[sy][sx] = tile_to_place
+                                tile_to_place = nearby_floor if nearby_floor is not None else self.random_floor()
+                                self.grid[sy, sx] = tile_to_place
             else:
                 # If we go out of bounds, break (shouldn't normally happen if rooms are inside bounds)
                 break
 
     def soften_edges(self):
-        iterations = 1
-        birth_limit = 5
-        death_limit = 5
+        for _ in self.soften_edges_steps():
+            pass
+
+    def soften_edges_steps(self):
+        """Cellular automaton pass turning lonely wall cells into floor, vectorized over bands of rows.
+
+        Every non-floor cell with at most death_limit wall neighbours (out of bounds
+        counts as wall) becomes the first floor type found among its neighbours,
+        the rest become the first neighbouring wall type. Runs self.smoothing times,
+        yielding after each band.
+        """
+        for _ in range(self.smoothing):
+            # Bands read the grid from before the pass and write into the next one
+            new_grid = self.grid.copy()
+            for top, bottom in self.row_bands():
+                self.soften_rows(self.grid, new_grid, top, bottom)
+                yield
+            self.grid = new_grid
 
-        for _ in range(iterations):
-            new_grid = [[cell for cell in row] for row in self.grid]
-
-            for y in range(self.height):
-                for x in range(self.width):
-                    wall_count = self.count_adjacent_walls(x, y)
-
-                    if self.grid[y][x] in self.floor_list:
-                        new_grid[y][x] = self.grid[y][x]
-                    else:
-                        nearby_floor = self.find_nearest_floor(x, y)
-                        tile_to_place = nearby_floor if nearby_floor else random.choices(self.floor_list, self.floor_weights, k=1)[0]
-                        nearby_wall = self.find_nearest_wall(x, y)
-                        wall_to_place = nearby_wall if nearby_wall else random.choices(self.wall_list, self.wall_weights, k=1)[0]
-                        if wall_count <= death_limit:
-                            new_grid[y][x] = tile_to_place
-                        else:
-                            new_grid[y][x] = wall_to_place
+    def soften_rows(self, grid, new_grid, top, bottom):
+        """Apply one automaton step to rows top..bottom of grid, writing the result into new_grid."""
+        death_limit = 5
 
-            self.grid = new_grid
+        # The band plus a one-cell border; rows outside the grid are added by padding
+        low, high = max(top - 1, 0), min(bottom + 1, self.height)
+        window = grid[low:high]
+        padding = ((low - (top - 1), (bottom + 1) - high), (1, 1))
+        padded_grid = np.pad(window.astype(np.int32), padding, constant_values=-1)
+        padded_wall = np.pad(self.is_wall[window], padding, constant_values=False)
+        padded_floor = np.pad(self.is_floor[window], padding, constant_values=False)
+        is_floor = padded_floor[1:-1, 1:-1]
+
+        # Out of bounds counts as wall for the neighbour count, but is never a neighbour to copy
+        wall_count = self.count_neighbours(np.pad(self.is_wall[window], padding, constant_values=True))
+        nearest_floor = self.first_neighbour(padded_grid, padded_floor)
+        nearest_wall = self.first_neighbour(padded_grid, padded_wall)
+
+        changing = ~is_floor
+        to_floor = changing & (wall_count <= death_limit)
+        to_wall = changing & ~to_floor
+
+        band = new_grid[top:bottom]
+        band[to_floor] = self.fill_missing(nearest_floor[to_floor], self.floor_ids, self.floor_weights)
+        band[to_wall] = self.fill_missing(nearest_wall[to_wall], self.wall_ids, self.wall_weights)
+
+    def count_neighbours(self, padded):
+        """Sum each cell's 8 neighbours in a mask padded by one cell on every side."""
+        height, width = padded.shape[0] - 2, padded.shape[1] - 2
+        count = np.zeros((height, width), dtype=np.int8)
+        for dx, dy in NEIGHBOUR_OFFSETS:
+            count += padded[1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+        return count
+
+    def first_neighbour(self, padded_grid, padded_mask):
+        """For each cell, the id of the first neighbour (in NEIGHBOUR_OFFSETS order) where mask is set, else -1.
+
+        Both arrays are padded by one cell on every side, the grid with -1 and the mask with False.
+        """
+        height, width = padded_grid.shape[0] - 2, padded_grid.shape[1] - 2
+        found = np.full((height, width), -1, dtype=np.int32)
+        # Walk the offsets backwards so the earliest match is written last
+        for dx, dy in reversed(NEIGHBOUR_OFFSETS):
+            window = (slice(1 + dy, 1 + dy + height), slice(1 + dx, 1 + dx + width))
+            found = np.where(padded_mask[window], padded_grid[window], found)
+        return found
+
+    def fill_missing(self, ids, choices, weights):
+        """Replace -1 entries with ids drawn from choices by weight."""
+        missing = ids < 0
+        if missing.any():
+            ids = ids.copy()
+            ids[missing] = self.rng.choices(list(choices), weights, k=int(missing.sum()))
+        return ids
 
-    def count_adjacent_walls(self, tile_x, tile_y):
-        wall_count = 0
-        for j in range(-1, 2):
-            for i in range(-1, 2):
-                if i == 0 and j == 0:
-                    continue
-                nx, ny = tile_x + i, tile_y + j
-                if 0 <= nx < self.width and 0 <= ny < self.height:
-                    if self.grid[ny][nx] in self.wall_list:
-                        wall_count += 1
-                else:
-                    wall_count += 1
-        return wall_count
-    
     def find_nearest_floor(self, tile_x, tile_y):
-        for j in range(-1, 2):
-            for i in range(-1, 2):
-                if i == 0 and j == 0:
-                    continue
-                nx, ny = tile_x + i, tile_y + j
-                if 0 <= nx < self.width and 0 <= ny < self.height:
-                    if self.grid[ny][nx] in self.floor_list:
-                        return self.grid[ny][nx]
-                else:
-                    continue
-        return None
-    
-    def find_nearest_wall(self, tile_x, tile_y):
-        for j in range(-1, 2):
-            for i in range(-1, 2):
-                if i == 0 and j == 0:
-                    continue
-                nx, ny = tile_x + i, tile_y + j
-                if 0 <= nx < self.width and 0 <= ny < self.height:
-                    if self.grid[ny][nx] in self.wall_list:
-                        return self.grid[ny][nx]
-                else:
-                    continue
+        for i, j in NEIGHBOUR_OFFSETS:
+            nx, ny = tile_x + i, tile_y + j
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                tile_id = self.grid[ny, nx]
+                if self.is_floor[tile_id]:
+                    return int(tile_id)
         return None
     
     def place_goal(self):
@@ -258,6 +429,5 @@ class DungeonGenerator:
 
         goal_x, goal_y = room_center_x, room_center_y
 
-        self.goal = Stairs(goal_x, goal_y)
-        self.dungeon.add_entity(self.goal)
+        self.goal = (goal_x, goal_y)
 
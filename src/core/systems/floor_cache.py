@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+from config import FLOOR_CACHE_ENTRIES
+from core.systems.dungeon_generator import Room
+from core.systems.floor_layout import FloorLayout, SPAWN_KINDS, current_definitions, floor_layout_steps
+from core.systems.job import run_job
+
+# Bump whenever generation changes so layouts from older code are not reused
+LAYOUT_VERSION = 3
+
+def definitions_hash(settings):
+    """Hash the dungeon settings and every loaded definition that shapes a floor."""
+    payload = current_definitions(settings)
+    payload["version"] = LAYOUT_VERSION
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def cached_floor_layout(settings, seed, floor_cache=None):
+    """Load the layout for seed from floor_cache, generating and storing it on a miss."""
+    return run_job(cached_floor_layout_steps(settings, seed, floor_cache))
+
+
+def cached_floor_layout_steps(settings, seed, floor_cache=None, definitions_ready=None):
+    """cached_floor_layout as a resumable job, see DungeonGenerator.generate_steps.
+
+    While definitions are still arriving, see floor_layout_steps, the layout
+    is generated rather than looked up, as the cache key covers all of them.
+    Generation is deterministic, so the result is the same either way.
+    """
+    if floor_cache is None:
+        return (yield from floor_layout_steps(settings, seed, definitions_ready))
+    if definitions_ready is not None and not definitions_ready():
+        layout = yield from floor_layout_steps(settings, seed, definitions_ready)
+        floor_cache.store(layout, definitions_hash(settings))
+        return layout
+
+    digest = definitions_hash(settings)
+    layout = floor_cache.load(seed, digest)
+    if layout is None:
+        layout = yield from floor_layout_steps(settings, seed)
+        floor_cache.store(layout, digest)
+    return layout
+
+
+class FloorCache:
+    """Content-addressed store of generated floor layouts, one .npz file per (seed, definitions hash).
+
+    At most max_entries layouts are kept, the least recently used are deleted first.
+    """
+
+    def __init__(self, directory, max_entries=FLOOR_CACHE_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def path_for(self, seed, definitions_digest):
+        key = hashlib.sha256(f"{seed}:{definitions_digest}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load(self, seed, definitions_digest):
+        """Return the cached FloorLayout, or None if it was never stored or is unreadable."""
+        path = self.path_for(seed, definitions_digest)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                rooms = [Room(*room) for room in data["rooms"].tolist()]
+                corridors = [tuple(corridor) for corridor in data["corridors"].tolist()]
+                goal = tuple(data["goal"].tolist())
+                spawns = [(SPAWN_KINDS[kind], name, x, y) for kind, name, x, y in
+                          zip(data["spawn_kinds"].tolist(), data["spawn_names"].tolist(),
+                              data["spawn_x"].tolist(), data["spawn_y"].tolist())]
+                layout = FloorLayout(seed, data["grid"], rooms, corridors, goal, spawns)
+            # The modification time doubles as the last use for LRU eviction
+            os.utime(path)
+            return layout
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Ignoring unreadable floor cache entry {path}: {e}")
+            return None
+
+    def store(self, layout, definitions_digest):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(layout.seed, definitions_digest)
+        kinds, names, xs, ys = zip(*layout.spawns) if layout.spawns else ((), (), (), ())
+
+        # Write to a temporary file first so a crash never leaves a truncated entry behind
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as file:
+            np.savez_compressed(
+                file,
+                grid=layout.grid,
+                rooms=np.array([(r.x, r.y, r.width, r.height) for r in layout.rooms], dtype=np.int32).reshape(-1, 4),
+                corridors=np.array(layout.corridors, dtype=np.int32).reshape(-1, 2),
+                goal=np.array(layout.goal, dtype=np.int32),
+                spawn_kinds=np.array([SPAWN_KINDS.index(kind) for kind in kinds], dtype=np.uint8),
+                spawn_names=np.array(names, dtype=str),
+                spawn_x=np.array(xs, dtype=np.int32),
+                spawn_y=np.array(ys, dtype=np.int32),
+            )
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently used layouts beyond max_entries."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.endswith(".npz"):
+                    entries.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                # Removed by a concurrent eviction, e.g. in the pre-generation worker
+                pass
+        entries.sort()
+        for _, path in entries[:max(len(entries) - self.max_entries, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
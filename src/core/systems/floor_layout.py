@@ -0,0 +1,110 @@
+import random
+from config import ENEMY_SPAWN_CLEARANCE
+from core.systems.dungeon_generator import DungeonGenerator
+from core.systems.job import run_job, wait_until
+from core.systems.spawn_index import SpawnIndex
+
+from core.systems.tile import Tile, factory
+from core.objects.enemy import enemy_factory
+from core.objects.item import item_factory
+from core.objects.statics import static_factory
+
+# Kinds of spawns in a layout, in the order they are placed
+SPAWN_KINDS = ("enemy", "item", "static")
+
+class FloorLayout:
+    """Everything needed to rebuild a floor: tile ids, rooms and their corridors, stairs and spawns.
+
+    A layout is plain data with no pygame objects, so it can be cached on disk
+    or produced in another process and turned into a Dungeon later.
+    """
+
+    def __init__(self, seed, grid, rooms, corridors, goal, spawns):
+        self.seed = seed
+        self.grid = grid
+        self.rooms = rooms
+        # (i, j) indices into rooms of every pair joined by a corridor
+        self.corridors = corridors
+        self.goal = goal
+        # List of (kind, name, x, y), kind being one of SPAWN_KINDS
+        self.spawns = spawns
+
+
+def current_definitions(settings):
+    """Snapshot the loaded definitions that shape a floor, as plain picklable data.
+
+    Tiles are listed in id order so the tile ids of a layout mean the same
+    thing wherever the snapshot is loaded again.
+    """
+    return {
+        "settings": dict(settings),
+        "tiles": [(name, dict(factory.tile_properties[name])) for name in factory.tile_names],
+        "enemies": enemy_factory.enemy_definitions,
+        "items": item_factory.item_definitions,
+        "statics": static_factory.enemy_definitions,
+    }
+
+
+def load_definitions(definitions):
+    """Load a current_definitions snapshot into the factories of this process."""
+    factory.clear()
+    for name, properties in definitions["tiles"]:
+        factory.register_tile(name, Tile, tuple(properties["color"]), properties["collide"],
+                              properties["wall"], properties["rarity"])
+    enemy_factory.enemy_definitions = definitions["enemies"]
+    item_factory.item_definitions = definitions["items"]
+    static_factory.enemy_definitions = definitions["statics"]
+
+
+def spawn_requests():
+    """List the (kind, name) of every entity the loaded definitions ask for."""
+    requests = []
+    for enemy_def in enemy_factory.enemy_definitions:
+        requests += [("enemy", enemy_def['type'])] * enemy_def.get('amount', 0)
+    for item_def in item_factory.item_definitions:
+        requests += [("item", item_def['name'])] * item_def.get('amount', 0)
+    for static_def in static_factory.enemy_definitions:
+        requests += [("static", static_def['type'])] * static_def.get('amount', 0)
+    return requests
+
+
+def plan_spawns(spawn_index, entry_point, requests):
+    """Assign a position to every (kind, name) request, one batched draw per kind."""
+    spawns = []
+    for kind in SPAWN_KINDS:
+        names = [name for request_kind, name in requests if request_kind == kind]
+        if kind == "enemy":
+            # Keep enemies away from where the player enters the floor
+            points = spawn_index.sample(len(names), exclude_center=entry_point, exclude_radius=ENEMY_SPAWN_CLEARANCE)
+        else:
+            points = spawn_index.sample(len(names))
+        spawns += [(kind, name, x, y) for name, (x, y) in zip(names, points)]
+    return spawns
+
+
+def generate_floor_layout(settings, seed):
+    """Generate a floor deterministically from dungeon settings and a seed.
+
+    settings holds width, height, num_rooms, room_min_size, room_max_size,
+    wiggly, smoothing and scalable, see Dungeon.generator_settings.
+    """
+    return run_job(floor_layout_steps(settings, seed))
+
+
+def floor_layout_steps(settings, seed, definitions_ready=None):
+    """generate_floor_layout as a resumable job, see DungeonGenerator.generate_steps.
+
+    The tiles are generated from the tile definitions alone; spawns are only
+    planned once definitions_ready(), if given, reports the enemy, item and
+    static definitions are loaded too.
+    """
+    rng = random.Random(seed)
+    generator = DungeonGenerator(rng=rng, **settings)
+    yield from generator.generate_steps()
+    grid, rooms = generator.grid, generator.rooms
+    yield from wait_until(definitions_ready)
+
+    spawn_index = SpawnIndex(~factory.collide_table[grid], rng)
+    yield
+    spawns = plan_spawns(spawn_index, rooms[0].center(), spawn_requests())
+    return FloorLayout(seed, grid, rooms, generator.corridors, generator.goal, spawns)
@@ -0,0 +1,134 @@
+import multiprocessing
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+
+from core.systems.floor_cache import FloorCache, cached_floor_layout
+from core.systems.floor_layout import (FloorLayout, current_definitions, load_definitions,
+                                       generate_floor_layout, plan_spawns, spawn_requests)
+from core.systems.spawn_index import SpawnIndex
+from core.systems.tile import factory
+
+def pregenerate_layout(definitions, seed, cache_directory=None):
+    """Worker entry point: generate a layout with the definitions snapshot taken by the game."""
+    load_definitions(definitions)
+    floor_cache = FloorCache(cache_directory) if cache_directory else None
+    return cached_floor_layout(definitions["settings"], seed, floor_cache)
+
+
+def tile_classes(tiles, wall):
+    """List (id, name, properties) of the wall (wall=1) or floor (wall=0) tiles of a snapshot."""
+    return [(tile_id, name, properties) for tile_id, (name, properties) in enumerate(tiles) if properties["wall"] == wall]
+
+
+def fit_layout(layout, provisional, settings):
+    """Adapt a layout generated from the provisional definitions to the ones loaded now.
+
+    Rooms and corridors only depend on the dungeon settings, so they are kept
+    unless those changed. Wall and floor cells are retiled only if their set
+    of tile types changed, floors a whole tile type at a time, and spawns are
+    only moved or redrawn where they no longer match what the definitions ask
+    for.
+    """
+    final = current_definitions(settings)
+    if final == provisional:
+        return layout
+    if final["settings"] != provisional["settings"]:
+        print("Dungeon settings changed, regenerating the pre-generated floor")
+        return generate_floor_layout(settings, layout.seed)
+
+    grid = layout.grid.astype(factory.id_dtype())
+    np_rng = np.random.default_rng(layout.seed)
+    for wall, table in ((1, factory.wall_table), (0, factory.floor_table)):
+        old_tiles = tile_classes(provisional["tiles"], wall)
+        if old_tiles == tile_classes(final["tiles"], wall):
+            continue
+        # The cells of this class keep their shape but draw from the new tile types
+        ids = np.flatnonzero(table)
+        weights = factory.rarity_table[ids]
+        probabilities = weights / weights.sum()
+        if wall:
+            # Generation fills walls cell by cell
+            cells = np.isin(layout.grid, [tile_id for tile_id, _, _ in old_tiles])
+            grid[cells] = np_rng.choice(ids, size=int(cells.sum()), p=probabilities)
+        else:
+            # Generation gives every room and corridor a single floor type, so each old type maps to one new type
+            for tile_id, _, _ in old_tiles:
+                grid[layout.grid == tile_id] = np_rng.choice(ids, p=probabilities)
+
+    walkable = ~factory.collide_table[grid]
+    wanted = Counter(spawn_requests())
+    spawns = []
+    for kind, name, x, y in layout.spawns:
+        if wanted[(kind, name)] > 0 and walkable[y, x]:
+            wanted[(kind, name)] -= 1
+            spawns.append((kind, name, x, y))
+
+    spawn_index = SpawnIndex(walkable, random.Random(layout.seed))
+    spawn_index.reserve([(x, y) for _, _, x, y in spawns])
+    spawns += plan_spawns(spawn_index, layout.rooms[0].center(), list(wanted.elements()))
+    return FloorLayout(layout.seed, grid, layout.rooms, layout.corridors, layout.goal, spawns)
+
+
+class FloorPregenerator:
+    """Generates the next floor's layout in a worker process while the current floor is played.
+
+    start snapshots the definitions loaded at that point as a provisional
+    config; take waits for the worker and fits its layout to the definitions
+    loaded by the time the player reaches the stairs.
+    """
+
+    def __init__(self, floor_cache=None):
+        self.executor = self.create_executor()
+        self.cache_directory = floor_cache.directory if floor_cache is not None else None
+        self.future = None
+        self.definitions = None
+
+    def create_executor(self):
+        # A fresh interpreter rather than a fork of one running pygame and the director thread
+        return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    def start(self, seed, settings):
+        """Begin generating the floor for seed with the currently loaded definitions."""
+        if self.future is not None:
+            self.future.cancel()
+        self.definitions = current_definitions(settings)
+        try:
+            self.future = self.executor.submit(pregenerate_layout, self.definitions, seed, self.cache_directory)
+        except (BrokenProcessPool, RuntimeError) as e:
+            # The next floor is generated on the game's side; the floor after it gets a fresh worker
+            print(f"Floor pre-generation unavailable: {e}")
+            self.future = None
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = self.create_executor()
+
+    def matches(self, settings):
+        """True if a layout was started for these dungeon settings, so take can fit it instead of regenerating."""
+        return self.future is not None and self.definitions["settings"] == settings
+
+    def discard(self):
+        """Drop the started layout, e.g. when the next floor turned out to use other dungeon settings."""
+        if self.future is not None:
+            self.future.cancel()
+        self.future = None
+
+    def ready(self):
+        """True unless a started layout is still being generated, i.e. take would not block."""
+        return self.future is None or self.future.done()
+
+    def take(self, settings):
+        """Return the pre-generated layout fitted to the loaded definitions, or None if there is none."""
+        if self.future is None:
+            return None
+        future, self.future = self.future, None
+        try:
+            layout = future.result()
+        except Exception as e:
+            print(f"Floor pre-generation failed: {e}")
+            return None
+        return fit_layout(layout, self.definitions, settings)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,84 @@
+from collections import deque
+from config import FLOW_FIELD_RADIUS
+
+class FlowField:
+    """Walking distance to a target tile, shared by every enemy chasing it.
+
+    The field is a breadth-first search over non-wall tiles, bounded to
+    FLOW_FIELD_RADIUS steps. It is only recomputed when the target moves to
+    another tile or a tile of the dungeon changes, so its cost does not grow
+    with the number of enemies following it.
+    """
+
+    def __init__(self, dungeon, radius=FLOW_FIELD_RADIUS):
+        self.dungeon = dungeon
+        self.radius = radius
+        self.target_tile = None
+        self.distances = {}
+        # Tile bounds (left, top, right, bottom) of the window the field was computed over
+        self.bounds = (0, 0, 0, 0)
+
+        dungeon.tile_listeners.append(self.mark_dirty)
+
+    def mark_dirty(self, tile_x=None, tile_y=None):
+        self.target_tile = None
+
+    def update(self, target):
+        """Recompute the field if the target stands on a different tile than last time."""
+        target_tile = (int(target.x), int(target.y))
+        if target_tile == self.target_tile:
+            return
+        self.target_tile = target_tile
+
+        self.distances = {}
+        tx, ty = target_tile
+        if not (0 <= tx < self.dungeon.width and 0 <= ty < self.dungeon.height):
+            return
+
+        # Only tiles within radius steps can be reached, so only that window is read
+        left, top = max(tx - self.radius, 0), max(ty - self.radius, 0)
+        right = min(tx + self.radius + 1, self.dungeon.width)
+        bottom = min(ty + self.radius + 1, self.dungeon.height)
+        self.bounds = (left, top, right, bottom)
+        width, height = right - left, bottom - top
+        # One byte per tile, non-zero where walkable; indexing bytes is fast in pure Python
+        walkable = (~self.dungeon.wall_window(left, top, right, bottom)).tobytes()
+
+        start = (ty - top) * width + (tx - left)
+        if not walkable[start]:
+            return
+        distances = {start: 0}
+        queue = deque([start])
+        while queue:
+            index = queue.popleft()
+            distance = distances[index]
+            if distance >= self.radius:
+                continue
+            x = index % width
+            for neighbour, valid in ((index - 1, x > 0), (index + 1, x < width - 1),
+                                     (index - width, index >= width), (index + width, index < (height - 1) * width)):
+                if valid and neighbour not in distances and walkable[neighbour]:
+                    distances[neighbour] = distance + 1
+                    queue.append(neighbour)
+        self.distances = distances
+
+    def distance_at(self, tile_x, tile_y):
+        """Steps from a tile to the target, or None if it is unreachable within the radius."""
+        left, top, right, bottom = self.bounds
+        if not (left <= tile_x < right and top <= tile_y < bottom):
+            return None
+        return self.distances.get((tile_y - top) * (right - left) + (tile_x - left))
+
+    def next_tile(self, tile_x, tile_y):
+        """Return the neighbouring tile one step closer to the target, or None."""
+        best = self.distance_at(tile_x, tile_y)
+        if best is None or best == 0:
+            return None
+
+        best_tile = None
+        for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            distance = self.distance_at(tile_x + dx, tile_y + dy)
+            if distance is not None and distance < best:
+                best = distance
+                best_tile = (tile_x + dx, tile_y + dy)
+        return best_tile
@@ -0,0 +1,27 @@
+import pygame
+
+class SimulatedClock:
+    """Game time that only moves when advanced, for running the game without a display."""
+
+    def __init__(self, frame_ms=1000 / 60):
+        self.frame_ms = frame_ms
+        self.time = 0.0
+
+    def advance(self):
+        self.time += self.frame_ms
+
+    def __call__(self):
+        return int(self.time)
+
+
+# Milliseconds since start; cooldowns and timers of entities read it through get_ticks
+_source = pygame.time.get_ticks
+
+def get_ticks():
+    return _source()
+
+
+def use_clock(source):
+    """Make get_ticks read from source, a callable returning milliseconds."""
+    global _source
+    _source = source
@@ -0,0 +1,35 @@
+import random
+from core.objects.player import Player
+from core.objects.stairs import Stairs
+from core.objects.item import Item
+from core.objects.statics import Static
+
+def step_floor(dungeon, player):
+    """Advance the floor by one frame around the player; return True if the player is on the stairs.
+
+    Shared by the game loop and the headless simulator so both play by the same rules.
+    """
+    player.update()
+    dungeon.projectiles.update()
+
+    reached_stairs = False
+    for ent in dungeon.entities_near(player.x, player.y, 30):
+        if isinstance(ent, Player):
+            continue
+
+        if ent.distance_to(player) < 30:
+            if isinstance(ent, Stairs) and ent.rect.colliderect(player.rect):
+                reached_stairs = True
+
+            if isinstance(ent, Item):
+                if ent.rect.colliderect(player.rect):
+                    if player.equip_item(ent):
+                        dungeon.remove_entity(ent)
+
+            if isinstance(ent, Static):
+                if ent.distance_to(player) < 3:
+                    if random.random() < 0.01:
+                        ent.interact(player)
+
+            ent.update()
+    return reached_stairs
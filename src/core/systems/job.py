@@ -0,0 +1,43 @@
+import time
+
+def run_job(job):
+    """Run a generator-based job to completion and return its result."""
+    while True:
+        try:
+            next(job)
+        except StopIteration as stop:
+            return stop.value
+
+
+class TimeSlicedJob:
+    """Runs a generator-based job a slice of time at a time.
+
+    The job yields after every bounded unit of work and returns its result;
+    run advances it until the time budget is spent, so the caller's frame
+    rate stays steady however much work the job has in total.
+    """
+
+    def __init__(self, job):
+        self.job = job
+        self.done = False
+        self.result = None
+
+    def run(self, budget_ms):
+        """Advance the job for about budget_ms milliseconds; return True once it has finished."""
+        deadline = time.perf_counter() + budget_ms / 1000
+        while not self.done:
+            try:
+                next(self.job)
+            except StopIteration as stop:
+                self.done = True
+                self.result = stop.value
+                break
+            if time.perf_counter() >= deadline:
+                break
+        return self.done
+
+
+def wait_until(ready):
+    """Yield until ready() returns True, for jobs that need input arriving from elsewhere; None never waits."""
+    while ready is not None and not ready():
+        yield
@@ -0,0 +1,78 @@
+import numpy as np
+from config import BRIGHTNESS_LEVELS
+
+# Light falls off linearly over this many tiles past a source's radius
+FALLOFF_STEPS = 4
+FALLOFF_PER_STEP = 1.0 / FALLOFF_STEPS
+
+def light_array(light_sources):
+    """Pack objects with x, y and light_radius into an (N, 3) array for Lightmap.build."""
+    return np.array([(light.x, light.y, light.light_radius) for light in light_sources],
+                    dtype=np.float32).reshape(-1, 3)
+
+
+class Lightmap:
+    """Brightness of a rectangular window of tiles, built once per frame."""
+
+    def __init__(self):
+        self.start_x = 0
+        self.start_y = 0
+        self.brightness = np.zeros((0, 0), dtype=np.float32)
+        self.levels = np.zeros((0, 0), dtype=np.int8)
+
+    def build(self, lights, start_x, start_y, width, height):
+        """Compute brightness for every tile in the window in one batched pass.
+
+        lights is an (N, 3) array of (x, y, light_radius) rows, see light_array.
+        Each source contributes full brightness within its Manhattan light_radius,
+        then loses FALLOFF_PER_STEP per tile beyond it. The brightest source wins.
+        """
+        self.start_x = start_x
+        self.start_y = start_y
+
+        lights = np.asarray(lights, dtype=np.float32).reshape(-1, 3)
+        lx, ly, radius = lights[:, 0], lights[:, 1], lights[:, 2]
+
+        # Skip sources whose falloff cannot reach the window at all
+        end_x = start_x + width - 1
+        end_y = start_y + height - 1
+        gap_x = np.maximum(np.maximum(start_x - lx, lx - end_x), 0)
+        gap_y = np.maximum(np.maximum(start_y - ly, ly - end_y), 0)
+        reaches = gap_x + gap_y < radius + FALLOFF_STEPS
+        lx, ly, radius = lx[reaches], ly[reaches], radius[reaches]
+
+        if len(lx) == 0:
+            self.brightness = np.zeros((height, width), dtype=np.float32)
+            self.levels = np.zeros((height, width), dtype=np.int8)
+            return self.brightness
+
+        xs = np.arange(start_x, start_x + width, dtype=np.float32)
+        ys = np.arange(start_y, start_y + height, dtype=np.float32)
+
+        # Shape (lights, height, width)
+        dist = np.abs(xs[None, None, :] - lx[:, None, None]) + np.abs(ys[None, :, None] - ly[:, None, None])
+        steps_beyond = np.maximum(dist - radius[:, None, None], 0)
+        per_light = np.clip(1.0 - FALLOFF_PER_STEP * steps_beyond, 0.0, 1.0)
+
+        self.brightness = per_light.max(axis=0)
+        # Palette index for pre-dimmed images, 0 (dark) .. BRIGHTNESS_LEVELS (fully lit)
+        self.levels = np.rint(self.brightness * BRIGHTNESS_LEVELS).astype(np.int8)
+        return self.brightness
+
+    def brightness_at(self, tile_x, tile_y):
+        """Look up the brightness of a tile; tiles outside the window are dark."""
+        ix = tile_x - self.start_x
+        iy = tile_y - self.start_y
+        height, width = self.brightness.shape
+        if 0 <= ix < width and 0 <= iy < height:
+            return float(self.brightness[iy, ix])
+        return 0.0
+
+    def level_at(self, tile_x, tile_y):
+        """Look up the quantized brightness level of a tile; tiles outside the window are dark."""
+        ix = tile_x - self.start_x
+        iy = tile_y - self.start_y
+        height, width = self.levels.shape
+        if 0 <= ix < width and 0 <= iy < height:
+            return int(self.levels[iy, ix])
+        return 0
@@ -0,0 +1,30 @@
+import gc
+import tracemalloc
+
+from core.systems.dungeon import Dungeon
+from core.systems.tile import factory
+
+def floor_memory_report(dungeon, renderer=None):
+    """Measure what the game holds in memory for the current floor, as a dict of counts and sizes."""
+    # Floors that were left must have been collected by now
+    gc.collect()
+    report = {
+        "live_dungeons": sum(1 for obj in gc.get_objects() if isinstance(obj, Dungeon)),
+        "entities": len(dungeon.all_entities),
+        "projectiles": len(dungeon.projectiles),
+        "tile_arrays_kib": dungeon.array_bytes() // 1024,
+        "tile_instances": len(factory.tile_instances),
+        "tile_types": len(factory.tile_names),
+    }
+    if renderer is not None:
+        report["tile_surfaces"] = len(renderer.tile_layer.chunks) if renderer.tile_layer is not None else 0
+        report["entity_palettes"] = len(renderer.entity_palettes)
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        report["traced_kib"] = current // 1024
+        report["traced_peak_kib"] = peak // 1024
+    return report
+
+
+def format_memory_report(floor, report):
+    return f"Floor {floor} memory: " + ", ".join(f"{key}={value}" for key, value in report.items())
@@ -0,0 +1,137 @@
+import numpy as np
+from config import TILE_SIZE_X, TILE_SIZE_Y
+
+class ProjectileSystem:
+    """Every live projectile of a floor, stored as parallel NumPy arrays.
+
+    update advances all projectiles, tests them against the wall mask and
+    resolves hits in one vectorized step per tick. Projectile.update is the
+    reference for the semantics: a projectile dies when it exceeds its range,
+    enters a wall or stalls, and otherwise damages the first entity with
+    take_damage (other than its owner) that its rect overlaps.
+    """
+
+    LIGHT_RADIUS = 1
+
+    def __init__(self, dungeon):
+        self.dungeon = dungeon
+        self.clear()
+
+    def clear(self):
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.dx = np.zeros(0)
+        self.dy = np.zeros(0)
+        self.speed = np.zeros(0)
+        self.acceleration = np.zeros(0)
+        self.distance_traveled = np.zeros(0)
+        self.range = np.zeros(0)
+        self.damage = np.zeros(0)
+        self.color = np.zeros((0, 3), dtype=np.uint8)
+        self.owner = np.zeros(0, dtype=object)
+
+    def __len__(self):
+        return len(self.x)
+
+    def spawn(self, x, y, dx, dy, speed=0.2, range_in_tiles=10, damage=2, color=(255, 255, 0), acceleration=0.0, owner=None):
+        """Add a single projectile; arguments match Projectile."""
+        self.spawn_many(x, y, [dx], [dy], speed, range_in_tiles, damage, color, acceleration, owner)
+
+    def spawn_many(self, x, y, dxs, dys, speed=0.2, range_in_tiles=10, damage=2, color=(255, 255, 0), acceleration=0.0, owner=None):
+        """Add one projectile per direction in dxs/dys, all sharing the remaining arguments."""
+        count = len(dxs)
+        owners = np.empty(count, dtype=object)
+        owners[:] = [owner] * count
+
+        self.x = np.concatenate([self.x, np.full(count, float(x))])
+        self.y = np.concatenate([self.y, np.full(count, float(y))])
+        self.dx = np.concatenate([self.dx, np.asarray(dxs, dtype=float)])
+        self.dy = np.concatenate([self.dy, np.asarray(dys, dtype=float)])
+        self.speed = np.concatenate([self.speed, np.full(count, float(speed))])
+        self.acceleration = np.concatenate([self.acceleration, np.full(count, float(acceleration))])
+        self.distance_traveled = np.concatenate([self.distance_traveled, np.zeros(count)])
+        self.range = np.concatenate([self.range, np.full(count, float(range_in_tiles))])
+        self.damage = np.concatenate([self.damage, np.full(count, float(damage))])
+        self.color = np.concatenate([self.color, np.tile(np.array(color[:3], dtype=np.uint8), (count, 1))])
+        self.owner = np.concatenate([self.owner, owners])
+
+    def keep(self, alive):
+        """Drop every projectile whose entry in the alive mask is False."""
+        self.x = self.x[alive]
+        self.y = self.y[alive]
+        self.dx = self.dx[alive]
+        self.dy = self.dy[alive]
+        self.speed = self.speed[alive]
+        self.acceleration = self.acceleration[alive]
+        self.distance_traveled = self.distance_traveled[alive]
+        self.range = self.range[alive]
+        self.damage = self.damage[alive]
+        self.color = self.color[alive]
+        self.owner = self.owner[alive]
+
+    def rects(self):
+        """Return the left and top pixel coordinates of every projectile's rect."""
+        return (self.x * TILE_SIZE_X).astype(np.intp), (self.y * TILE_SIZE_Y).astype(np.intp)
+
+    def lights(self):
+        """Return an (N, 3) array of (x, y, light_radius) rows for the lightmap."""
+        return np.column_stack([self.x, self.y, np.full(len(self.x), self.LIGHT_RADIUS)])
+
+    def update(self):
+        if len(self.x) == 0:
+            return
+
+        old_x, old_y = self.x, self.y
+        step = self.speed * (self.acceleration * self.distance_traveled + 1)
+        self.x = self.x + self.dx * step
+        self.y = self.y + self.dy * step
+        self.distance_traveled = self.distance_traveled + step
+
+        # Out of range, inside a wall, or slowed to a stop
+        dead = self.distance_traveled >= self.range
+        dead |= self.dungeon.blocked_tiles(self.x, self.y)
+        dead |= (np.abs(old_x - self.x) < 0.01) & (np.abs(old_y - self.y) < 0.01)
+
+        alive = ~dead
+        alive[alive] = ~self.resolve_hits(np.flatnonzero(alive))
+        self.keep(alive)
+
+    def resolve_hits(self, indices):
+        """Apply damage for the projectiles at indices; return a mask of those that hit something."""
+        hit = np.zeros(len(indices), dtype=bool)
+        if len(indices) == 0:
+            return hit
+
+        left, top = self.rects()
+        left, top = left[indices], top[indices]
+
+        # Only entities bucketed near the projectiles can be hit
+        targets = [ent for ent in self.dungeon.spatial.query_cells(
+                       left.min() // TILE_SIZE_X - 1, top.min() // TILE_SIZE_Y - 1,
+                       left.max() // TILE_SIZE_X + 1, top.max() // TILE_SIZE_Y + 1)
+                   if hasattr(ent, 'take_damage')]
+        if not targets:
+            return hit
+
+        target_rects = np.array([tuple(ent.rect) for ent in targets]).reshape(-1, 4)
+        ex, ey, ew, eh = target_rects.T
+
+        # Same test as Rect.colliderect, shape (projectiles, targets)
+        overlaps = ((left[:, None] < ex + ew) & (left[:, None] + TILE_SIZE_X > ex) &
+                    (top[:, None] < ey + eh) & (top[:, None] + TILE_SIZE_Y > ey))
+        # A projectile never hits its owner
+        columns = {id(ent): column for column, ent in enumerate(targets)}
+        owner_columns = np.array([columns.get(id(owner), -1) for owner in self.owner[indices]])
+        owned = np.flatnonzero(owner_columns >= 0)
+        overlaps[owned, owner_columns[owned]] = False
+
+        for row in np.flatnonzero(overlaps.any(axis=1)):
+            index = indices[row]
+            for column in np.flatnonzero(overlaps[row]):
+                ent = targets[column]
+                # An earlier projectile this tick may already have destroyed the target
+                if ent in self.dungeon.spatial:
+                    ent.take_damage(self.damage[index].item(), self.owner[index])
+                    hit[row] = True
+                    break
+        return hit
@@ -1,10 +1,25 @@
+import numpy as np
 import pygame
-from config import SCREEN_WIDTH, SCREEN_HEIGHT, LIGHT_RADIUS, TILE_SIZE_X, TILE_SIZE_Y
+from config import SCREEN_WIDTH, SCREEN_HEIGHT, LIGHT_RADIUS, TILE_SIZE_X, TILE_SIZE_Y, BRIGHTNESS_LEVELS
+from core.systems.lighting import Lightmap, light_array
+from core.systems.tile import factory, build_palette
+from core.systems.tile_layer import TileLayer
 
 class Renderer:
     def __init__(self, screen, camera):
         self.screen = screen
         self.camera = camera
+        self.lightmap = Lightmap()
+        self.tile_layer = None
+        # Black overlay whose per-pixel alpha darkens the tile layer, reused between frames
+        self.shade = None
+        # Pre-dimmed entity images keyed by (color, width, height)
+        self.entity_palettes = {}
+
+    def reset(self):
+        """Drop the caches built for the previous floor."""
+        self.tile_layer = None
+        self.entity_palettes = {}
 
     def render(self, dungeon, player, virtual_screen, message_text=None, message_start_time=0, message_duration=5000):
 
@@ -40,24 +55,12 @@ class Renderer:
         viewport_tiles_x = virtual_screen.get_width() // TILE_SIZE_X
         viewport_tiles_y = virtual_screen.get_height() // TILE_SIZE_Y
 
-        # Loop only through visible tiles
-        for ty in range(start_tile_y, start_tile_y + viewport_tiles_y + 1):
-            for tx in range(start_tile_x, start_tile_x + viewport_tiles_x + 1):
-                # Check boundaries
-                if 0 <= tx < dungeon.width and 0 <= ty < dungeon.height:
-                    tile = dungeon.grid[ty][tx]
-                    if tile:  # Ensure tile is not None
-                        brightness = self.get_tile_brightness(tile.tile_x, tile.tile_y, light_sources)
-                        tile_pos = self.camera.apply(tile)
-                        virtual_screen.blit(tile.image, tile_pos)
-
-                        # Apply dimming overlay if needed
-                        if brightness < 1.0:
-                            alpha = int((1.0 - brightness) * 255)
-                            dim_surface = pygame.Surface((TILE_SIZE_X, TILE_SIZE_Y))
-                            dim_surface.fill((0,0,0))
-                            dim_surface.set_alpha(alpha)
-                            virtual_screen.blit(dim_surface, tile_pos)
+        lights = np.concatenate([light_array(light_sources), dungeon.projectiles.lights()])
+
+        # Light the whole visible window at once, indexed [ty - start_tile_y][tx - start_tile_x]
+        self.lightmap.build(lights, start_tile_x, start_tile_y, viewport_tiles_x + 1, viewport_tiles_y + 1)
+
+        self.draw_tiles(dungeon, virtual_screen, start_tile_x, start_tile_y)
 
         for entity in dungeon.all_entities:
             if entity == player:
@@ -71,19 +74,16 @@ class Renderer:
             if (start_tile_y <= int_y <= start_tile_y + viewport_tiles_y and
                 start_tile_x <= int_x <= start_tile_x + viewport_tiles_x):
 
-                brightness = self.get_tile_brightness(int_x, int_y, light_sources)
+                level = self.lightmap.level_at(int_x, int_y)
 
                 # Draw the entity at its camera-adjusted position
                 entity_pos = self.camera.apply(entity)
-                virtual_screen.blit(entity.image, entity_pos)
+                if level < BRIGHTNESS_LEVELS:
+                    virtual_screen.blit(self.get_entity_image(entity, level), entity_pos)
+                else:
+                    virtual_screen.blit(entity.image, entity_pos)
 
-                # If brightness < 1.0, apply a dimming overlay
-                if brightness < 1.0:
-                    alpha = int((1.0 - brightness) * 255)
-                    dim_surface = pygame.Surface((entity.rect.width, entity.rect.height))
-                    dim_surface.fill((0,0,0))
-                    dim_surface.set_alpha(alpha)
-                    virtual_screen.blit(dim_surface, entity_pos)
+        self.draw_projectiles(dungeon.projectiles, virtual_screen)
 
         # Draw the player last or handle through entities if player is in all_entities
         player.draw(virtual_screen, self.camera)
@@ -96,27 +96,108 @@ class Renderer:
         self.screen.blit(scaled_surface, (0, 0))
         pygame.display.flip()
 
+    def draw_tiles(self, dungeon, surface, start_tile_x, start_tile_y):
+        """Draw the lit floor; tiles come from the cached chunk layer, darkened by a single overlay."""
+        if self.tile_layer is None or self.tile_layer.dungeon is not dungeon:
+            self.tile_layer = TileLayer(dungeon)
+        self.tile_layer.draw(surface, self.camera)
+        self.draw_shade(surface, start_tile_x, start_tile_y)
+
+    def draw_shade(self, surface, start_tile_x, start_tile_y):
+        """Darken the lightmap window by blitting one black overlay with per-pixel alpha."""
+        levels = self.lightmap.levels
+        height, width = levels.shape
+        size = (width * TILE_SIZE_X, height * TILE_SIZE_Y)
+        if self.shade is None or self.shade.get_size() != size:
+            self.shade = pygame.Surface(size, pygame.SRCALPHA)
+            self.shade.fill((0, 0, 0, 255))
+
+        alpha = (BRIGHTNESS_LEVELS - levels.astype(np.int16)) * 255 // BRIGHTNESS_LEVELS
+        # surfarray is indexed [x][y], so expand the transposed window to pixel size
+        alpha = np.repeat(np.repeat(alpha.T, TILE_SIZE_X, axis=0), TILE_SIZE_Y, axis=1)
+        shade_alpha = pygame.surfarray.pixels_alpha(self.shade)
+        shade_alpha[...] = alpha
+        del shade_alpha  # Unlock the surface before blitting
+
+        surface.blit(self.shade, (start_tile_x * TILE_SIZE_X - self.camera.camera.x,
+                                  start_tile_y * TILE_SIZE_Y - self.camera.camera.y))
+
+    def draw_projectiles(self, projectiles, surface):
+        """Draw the projectiles inside the viewport, dimmed like entities."""
+        left, top = projectiles.rects()
+        left = left - self.camera.camera.x
+        top = top - self.camera.camera.y
+        visible = np.flatnonzero((left > -TILE_SIZE_X) & (left < surface.get_width()) &
+                                 (top > -TILE_SIZE_Y) & (top < surface.get_height()))
+
+        for index in visible.tolist():
+            level = self.lightmap.level_at(int(projectiles.x[index]), int(projectiles.y[index]))
+            color = tuple(projectiles.color[index].tolist())
+            image = self.get_color_image(color, TILE_SIZE_X, TILE_SIZE_Y, level)
+            surface.blit(image, (int(left[index]), int(top[index])))
+
+    def get_entity_image(self, entity, level):
+        """Return a pre-dimmed copy of a solid-color entity image at a brightness level."""
+        color = tuple(entity.image.get_at((0, 0)))[:3]
+        return self.get_color_image(color, entity.rect.width, entity.rect.height, level)
+
+    def get_color_image(self, color, width, height, level):
+        key = (color, width, height)
+        palette = self.entity_palettes.get(key)
+        if palette is None:
+            palette = build_palette(color, width, height)
+            self.entity_palettes[key] = palette
+        return palette[level]
+
+
+class ArrayRenderer(Renderer):
+    """Renderer backend that composites the floor as one NumPy RGB array per frame.
+
+    Every tile is a solid color, so the visible window is a gather from the
+    pre-dimmed palette by (tile id, brightness level), pushed with surfarray.
+    """
 
-    def get_tile_brightness(self, tile_x, tile_y, light_sources):
-        brightness = 0.0
-        for light in light_sources:
-            (lx, ly) = light.x, light.y
-            dx = tile_x - lx
-            dy = tile_y - ly
-            dist = abs(dx) + abs(dy)
-
-            if dist <= light.light_radius:
-                source_brightness = 1.0
-            else:
-                steps_beyond = dist - light.light_radius
-                if steps_beyond >= 4:
-                    source_brightness = 0.0
-                else:
-                    source_brightness = 1.0 - (0.25 * steps_beyond)
-
-            brightness = max(brightness, source_brightness)
-
-        return brightness
-
-
-    
\ No newline at end of file
+    def __init__(self, screen, camera):
+        super().__init__(screen, camera)
+        self.frame = None
+
+    def draw_tiles(self, dungeon, surface, start_tile_x, start_tile_y):
+        levels = self.lightmap.levels
+        height, width = levels.shape
+
+        # Out-of-bounds cells index an extra all-black palette entry
+        colors = factory.get_palette_colors()
+        empty_id = len(colors)
+        colors = np.concatenate([colors, np.zeros((1,) + colors.shape[1:], dtype=np.uint8)])
+
+        left, top = max(start_tile_x, 0), max(start_tile_y, 0)
+        right = min(start_tile_x + width, dungeon.width)
+        bottom = min(start_tile_y + height, dungeon.height)
+        ids = np.full((height, width), empty_id, dtype=np.intp)
+        if left < right and top < bottom:
+            ids[top - start_tile_y:bottom - start_tile_y, left - start_tile_x:right - start_tile_x] = \
+                dungeon.grid_window(left, top, right, bottom)
+
+        rgb = colors[ids, levels]
+        # surfarray is indexed [x][y], so expand the transposed window to pixel size
+        pixels = np.repeat(np.repeat(rgb.transpose(1, 0, 2), TILE_SIZE_X, axis=0), TILE_SIZE_Y, axis=1)
+
+        size = (width * TILE_SIZE_X, height * TILE_SIZE_Y)
+        if self.frame is None or self.frame.get_size() != size:
+            self.frame = pygame.Surface(size)
+        pygame.surfarray.blit_array(self.frame, pixels)
+
+        surface.blit(self.frame, (start_tile_x * TILE_SIZE_X - self.camera.camera.x,
+                                  start_tile_y * TILE_SIZE_Y - self.camera.camera.y))
+
+
+RENDERERS = {
+    "blit": Renderer,
+    "array": ArrayRenderer,
+}
+
+def create_renderer(backend, screen, camera):
+    """Create the renderer backend selected by name, see RENDERERS."""
+    if backend not in RENDERERS:
+        raise ValueError(f"Unknown renderer backend '{backend}'.")
+    return RENDERERS[backend](screen, camera)
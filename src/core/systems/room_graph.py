@@ -0,0 +1,235 @@
+import heapq
+from collections import deque
+import numpy as np
+from config import PATH_CORRIDOR_MARGIN, PATH_ENTRY_RADIUS
+
+class RoomGraph:
+    """The rooms of a floor and the corridors the generator carved between them.
+
+    corridors holds (i, j) pairs of room indices; a corridor runs from the
+    center of room i to the center of room j. room_ids maps every cell to the
+    index of the room covering it, or -1 outside rooms.
+    """
+
+    def __init__(self, rooms, corridors, width, height):
+        self.rooms = rooms
+        self.corridors = corridors
+        self.neighbours = {index: [] for index in range(len(rooms))}
+        for i, j in corridors:
+            self.neighbours[i].append(j)
+            self.neighbours[j].append(i)
+
+        self.room_ids = np.full((height, width), -1, dtype=np.int32)
+        for index, room in enumerate(rooms):
+            self.room_ids[room.y:room.y + room.height, room.x:room.x + room.width] = index
+
+    def room_at(self, tile_x, tile_y):
+        """Index of the room covering a tile, or -1."""
+        height, width = self.room_ids.shape
+        if 0 <= tile_x < width and 0 <= tile_y < height:
+            return int(self.room_ids[tile_y, tile_x])
+        return -1
+
+    def corridor_endpoints(self, i, j):
+        return self.rooms[i].center(), self.rooms[j].center()
+
+    def room_path(self, start_room, goal_room):
+        """A* over the room graph, edges costed by Manhattan distance between centers; returns room indices or None."""
+        def estimate(a, b):
+            (ax, ay), (bx, by) = self.rooms[a].center(), self.rooms[b].center()
+            return abs(ax - bx) + abs(ay - by)
+
+        came_from = {start_room: None}
+        costs = {start_room: 0}
+        frontier = [(estimate(start_room, goal_room), start_room)]
+        while frontier:
+            _, room = heapq.heappop(frontier)
+            if room == goal_room:
+                path = []
+                while room is not None:
+                    path.append(room)
+                    room = came_from[room]
+                return path[::-1]
+            for neighbour in self.neighbours[room]:
+                cost = costs[room] + estimate(room, neighbour)
+                if cost < costs.get(neighbour, float("inf")):
+                    costs[neighbour] = cost
+                    came_from[neighbour] = room
+                    heapq.heappush(frontier, (cost + estimate(neighbour, goal_room), neighbour))
+        return None
+
+
+class RoomPathfinder:
+    """Long-range paths in the style of HPA*: plan over the room graph, then stitch tile segments.
+
+    A request searches the small room graph first, then joins three kinds of
+    tile paths: from the start into its nearest room, the corridors along the
+    room route, and out of the last room to the goal. Corridor segments are
+    searched within a box around their two rooms and cached until a tile of
+    the dungeon changes, as are the paths from a tile inside a room to its
+    center, so repeated requests cost little more than the room search.
+    """
+
+    def __init__(self, dungeon, room_graph):
+        self.dungeon = dungeon
+        self.room_graph = room_graph
+        self.segments = {}
+        # Paths from a tile to the center of the room it is in, by (tile, room index)
+        self.room_segments = {}
+        self.walkable = None
+
+        dungeon.tile_listeners.append(self.mark_dirty)
+
+    def mark_dirty(self, tile_x=None, tile_y=None):
+        self.segments = {}
+        self.room_segments = {}
+        self.walkable = None
+
+    def walkable_bytes(self):
+        if self.walkable is None:
+            # One byte per tile, non-zero where walkable; the same layout as FlowField uses
+            self.walkable = (~self.dungeon.wall_mask).tobytes()
+        return self.walkable
+
+    def find_path(self, start, goal):
+        """Return the tiles from start (excluded) to goal (included), or None if there is no route."""
+        start, goal = (int(start[0]), int(start[1])), (int(goal[0]), int(goal[1]))
+        if start == goal:
+            return []
+
+        # Close by, a small direct search beats detouring through room centers
+        if abs(start[0] - goal[0]) + abs(start[1] - goal[1]) <= PATH_ENTRY_RADIUS:
+            path = self.search(start, goal, self.box(start, goal, PATH_CORRIDOR_MARGIN))
+            if path is not None:
+                return path
+
+        start_room, into_start = self.enter_room(start)
+        goal_room, into_goal = self.enter_room(goal)
+        if start_room == goal_room or start_room < 0 or goal_room < 0:
+            # Nearby, or off the room graph: fall back to a plain search around both points
+            return self.search(start, goal, self.box(start, goal, PATH_ENTRY_RADIUS))
+
+        rooms = self.room_graph.room_path(start_room, goal_room)
+        if rooms is None:
+            return None
+
+        path = into_start
+        for i, j in zip(rooms, rooms[1:]):
+            segment = self.corridor_segment(i, j)
+            if segment is None:
+                return None
+            path += segment
+        # into_goal leads from the goal to its room's center, so walk it backwards
+        if into_goal:
+            path += into_goal[::-1][1:] + [goal]
+        return path
+
+    def enter_room(self, tile):
+        """Find the nearest room from a tile; return (room index, tiles from tile (excluded) to its center)."""
+        room = self.room_graph.room_at(*tile)
+        if room < 0:
+            # Breadth-first search out of a corridor until a room cell is reached
+            to_room = self.search_nearest_room(tile)
+            if to_room is None:
+                return -1, []
+            inside = to_room[-1]
+            room = self.room_graph.room_at(*inside)
+        else:
+            to_room = []
+            inside = tile
+
+        key = (inside, room)
+        if key not in self.room_segments:
+            center = self.room_graph.rooms[room].center()
+            self.room_segments[key] = self.search(inside, center, self.room_box(room))
+        in_room = self.room_segments[key]
+        if in_room is None:
+            return -1, []
+        return room, to_room + in_room
+
+    def corridor_segment(self, i, j):
+        """Tiles from the center of room i (excluded) to the center of room j (included), cached."""
+        key = (min(i, j), max(i, j))
+        if key not in self.segments:
+            start, goal = self.room_graph.corridor_endpoints(*key)
+            left, top, right, bottom = self.room_box(key[0])
+            other = self.room_box(key[1])
+            box = (min(left, other[0]) - PATH_CORRIDOR_MARGIN, min(top, other[1]) - PATH_CORRIDOR_MARGIN,
+                   max(right, other[2]) + PATH_CORRIDOR_MARGIN, max(bottom, other[3]) + PATH_CORRIDOR_MARGIN)
+            # A wiggly corridor may leave the box, in which case the whole floor is searched once
+            segment = self.search(start, goal, box)
+            if segment is None:
+                segment = self.search(start, goal)
+            self.segments[key] = segment
+
+        segment = self.segments[key]
+        if segment is None or key == (i, j):
+            return segment
+        start = self.room_graph.corridor_endpoints(*key)[0]
+        return segment[::-1][1:] + [start]
+
+    def room_box(self, room_index):
+        room = self.room_graph.rooms[room_index]
+        return room.x, room.y, room.x + room.width - 1, room.y + room.height - 1
+
+    def box(self, a, b, margin):
+        return (min(a[0], b[0]) - margin, min(a[1], b[1]) - margin,
+                max(a[0], b[0]) + margin, max(a[1], b[1]) + margin)
+
+    def search_nearest_room(self, start):
+        """Breadth-first search from start for the closest room cell within PATH_ENTRY_RADIUS steps."""
+        width, height = self.dungeon.width, self.dungeon.height
+        walkable = self.walkable_bytes()
+        came_from = {start: None}
+        queue = deque([(start, 0)])
+        while queue:
+            tile, distance = queue.popleft()
+            if self.room_graph.room_at(*tile) >= 0:
+                path = []
+                while tile != start:
+                    path.append(tile)
+                    tile = came_from[tile]
+                return path[::-1]
+            if distance >= PATH_ENTRY_RADIUS:
+                continue
+            x, y = tile
+            for neighbour in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                nx, ny = neighbour
+                if 0 <= nx < width and 0 <= ny < height and neighbour not in came_from and walkable[ny * width + nx]:
+                    came_from[neighbour] = tile
+                    queue.append((neighbour, distance + 1))
+        return None
+
+    def search(self, start, goal, box=None):
+        """A* between two tiles, optionally kept inside an inclusive (left, top, right, bottom) box.
+
+        Returns the tiles from start (excluded) to goal (included), or None.
+        """
+        width, height = self.dungeon.width, self.dungeon.height
+        left, top, right, bottom = box if box is not None else (0, 0, width - 1, height - 1)
+        left, top = max(left, 0), max(top, 0)
+        right, bottom = min(right, width - 1), min(bottom, height - 1)
+        walkable = self.walkable_bytes()
+
+        gx, gy = goal
+        came_from = {start: None}
+        costs = {start: 0}
+        frontier = [(abs(start[0] - gx) + abs(start[1] - gy), start)]
+        while frontier:
+            _, tile = heapq.heappop(frontier)
+            if tile == goal:
+                path = []
+                while tile != start:
+                    path.append(tile)
+                    tile = came_from[tile]
+                return path[::-1]
+            x, y = tile
+            cost = costs[tile] + 1
+            for neighbour in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                nx, ny = neighbour
+                if left <= nx <= right and top <= ny <= bottom and walkable[ny * width + nx]:
+                    if cost < costs.get(neighbour, cost + 1):
+                        costs[neighbour] = cost
+                        came_from[neighbour] = tile
+                        heapq.heappush(frontier, (cost + abs(nx - gx) + abs(ny - gy), neighbour))
+        return None
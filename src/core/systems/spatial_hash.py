@@ -0,0 +1,85 @@
+from config import TILE_SIZE_X, TILE_SIZE_Y
+
+class SpatialHash:
+    """Uniform grid of entities bucketed by the tile they stand on.
+
+    Entities are assumed to be at most one tile in size, which is true for
+    everything the dungeon holds, so a query only needs to widen its search
+    by a single tile to catch rects that overlap from a neighbouring cell.
+    """
+
+    def __init__(self, cell_size=4):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entity_cells = {}
+
+    def cell_of(self, entity):
+        return (int(entity.x) // self.cell_size, int(entity.y) // self.cell_size)
+
+    def __contains__(self, entity):
+        return entity in self.entity_cells
+
+    def __len__(self):
+        return len(self.entity_cells)
+
+    def insert(self, entity):
+        key = self.cell_of(entity)
+        # Dicts keep insertion order, so queries return entities in a stable order
+        self.cells.setdefault(key, {})[entity] = None
+        self.entity_cells[entity] = key
+
+    def remove(self, entity):
+        key = self.entity_cells.pop(entity, None)
+        if key is None:
+            return
+        cell = self.cells[key]
+        del cell[entity]
+        if not cell:
+            del self.cells[key]
+
+    def update(self, entity):
+        """Re-bucket an entity after its position changed."""
+        key = self.entity_cells.get(entity)
+        if key is None:
+            return
+        new_key = self.cell_of(entity)
+        if new_key != key:
+            self.remove(entity)
+            self.insert(entity)
+
+    def clear(self):
+        self.cells.clear()
+        self.entity_cells.clear()
+
+    def query_cells(self, left, top, right, bottom):
+        """Return every entity bucketed in cells covering the tile range (inclusive)."""
+        size = self.cell_size
+        min_cx, max_cx = int(left) // size, int(right) // size
+        min_cy, max_cy = int(top) // size, int(bottom) // size
+        found = []
+        if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) > len(self.cells):
+            # Wide queries over a sparse floor: scanning the occupied cells is cheaper
+            for (cx, cy), cell in self.cells.items():
+                if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy:
+                    found.extend(cell)
+            return found
+        for cy in range(min_cy, max_cy + 1):
+            for cx in range(min_cx, max_cx + 1):
+                cell = self.cells.get((cx, cy))
+                if cell:
+                    found.extend(cell)
+        return found
+
+    def query_radius(self, x, y, radius):
+        """Return entities within a Manhattan distance of a tile position."""
+        candidates = self.query_cells(x - radius, y - radius, x + radius, y + radius)
+        return [ent for ent in candidates if abs(ent.x - x) + abs(ent.y - y) <= radius]
+
+    def query_rect(self, rect):
+        """Return entities whose rect overlaps a rect given in pixels."""
+        left = rect.left // TILE_SIZE_X - 1
+        top = rect.top // TILE_SIZE_Y - 1
+        right = (rect.right - 1) // TILE_SIZE_X
+        bottom = (rect.bottom - 1) // TILE_SIZE_Y
+        candidates = self.query_cells(left, top, right, bottom)
+        return [ent for ent in candidates if rect.colliderect(ent.rect)]
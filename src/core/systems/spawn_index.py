@@ -0,0 +1,62 @@
+import random
+import numpy as np
+
+class SpawnIndex:
+    """Precomputed walkable cells of a floor, for drawing spawn positions.
+
+    Cells handed out by sample are reserved so later samples do not stack
+    entities on the same tile.
+    """
+
+    def __init__(self, walkable, rng=None):
+        self.rng = rng if rng is not None else random.Random()
+        self.width = walkable.shape[1]
+        self.cells = np.flatnonzero(walkable)
+        self.available = np.ones(len(self.cells), dtype=bool)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def to_point(self, cell):
+        return int(cell % self.width), int(cell // self.width)
+
+    def points(self):
+        """Return every walkable cell as (x, y)."""
+        return [self.to_point(cell) for cell in self.cells]
+
+    def reserve(self, points):
+        """Mark walkable (x, y) cells as taken so sample never hands them out."""
+        indices = np.searchsorted(self.cells, [y * self.width + x for x, y in points])
+        self.available[indices] = False
+
+    def random_point(self):
+        """Return any walkable cell, reserved or not."""
+        return self.to_point(self.cells[self.rng.randrange(len(self.cells))])
+
+    def sample(self, count, exclude_center=None, exclude_radius=0):
+        """Draw count distinct unreserved cells as (x, y) and reserve them.
+
+        Cells closer than exclude_radius (Manhattan) to exclude_center are skipped.
+        If there are not enough cells left, the remainder is drawn with
+        replacement from the candidates, or from the whole floor if none remain.
+        """
+        if count <= 0 or len(self.cells) == 0:
+            return []
+
+        candidates = self.available.copy()
+        if exclude_center is not None and exclude_radius > 0:
+            center_x, center_y = exclude_center
+            xs = self.cells % self.width
+            ys = self.cells // self.width
+            candidates &= np.abs(xs - center_x) + np.abs(ys - center_y) >= exclude_radius
+        candidates = np.flatnonzero(candidates)
+        if len(candidates) == 0:
+            candidates = np.arange(len(self.cells))
+
+        picked = candidates[self.rng.sample(range(len(candidates)), min(count, len(candidates)))]
+        if count > len(candidates):
+            extra = [self.rng.randrange(len(candidates)) for _ in range(count - len(candidates))]
+            picked = np.concatenate([picked, candidates[extra]])
+
+        self.available[picked] = False
+        return [self.to_point(cell) for cell in self.cells[picked]]
@@ -1,10 +1,11 @@
+import numpy as np
 import pygame
 import yaml
 import os
-from config import TILE_SIZE_X, TILE_SIZE_Y
+from config import TILE_SIZE_X, TILE_SIZE_Y, BRIGHTNESS_LEVELS
 
 class Tile(pygame.sprite.Sprite):
-    def __init__(self, tile_x, tile_y, tile_type, color, collide=0, wall=0, rarity=50):
+    def __init__(self, tile_x, tile_y, tile_type, color, collide=0, wall=0, rarity=50, image=None):
         super().__init__()
         self.tile_x = tile_x  # Tile coordinate x
         self.tile_y = tile_y  # Tile coordinate y
@@ -18,8 +19,10 @@ class Tile(pygame.sprite.Sprite):
         # Convert tile coordinates to pixel coordinates for rendering
         pixel_x = tile_x * TILE_SIZE_X
         pixel_y = tile_y * TILE_SIZE_Y
-        self.image = pygame.Surface((TILE_SIZE_X, TILE_SIZE_Y))
-        self.image.fill(color)
+        if image is None:
+            image = pygame.Surface((TILE_SIZE_X, TILE_SIZE_Y))
+            image.fill(color)
+        self.image = image
         self.rect = self.image.get_rect(topleft=(pixel_x, pixel_y))
 
     def add_component(self, component):
@@ -38,12 +41,42 @@ class Tile(pygame.sprite.Sprite):
         return any(comp.name == component_name for comp in self.components)
 
 
+def build_palette(color, width, height):
+    """Pre-render a solid color at every brightness level, darkest first."""
+    palette = []
+    for level in range(BRIGHTNESS_LEVELS + 1):
+        brightness = level / BRIGHTNESS_LEVELS
+        surface = pygame.Surface((width, height))
+        surface.fill(tuple(int(c * brightness) for c in color[:3]))
+        palette.append(surface)
+    return palette
+
+
 class TileFactory:
     def __init__(self):
         self.tile_classes = {}
         self.tile_properties = {}
+        self.tile_palettes = {}
+        # Flyweight tables: a stable integer id per tile type, in registration order,
+        # and per-id arrays shared by every cell of that type
+        self.tile_ids = {}
+        self.tile_names = []
+        self.wall_table = np.zeros(0, dtype=bool)
+        self.floor_table = np.zeros(0, dtype=bool)
+        self.rarity_table = np.zeros(0)
+        self.collide_table = np.zeros(0, dtype=bool)
+        self.palette_colors = None
         self.tile_instances = []
 
+    def clear(self):
+        """Forget every registered tile type; ids are handed out from 0 again."""
+        self.tile_classes = {}
+        self.tile_properties = {}
+        self.tile_palettes = {}
+        self.tile_ids = {}
+        self.tile_names = []
+        self.build_tables()
+
     def load_tile_definitions(self, file_path):
         """Load tile definitions from a YAML file."""
         with open(file_path, 'r') as file:
@@ -63,6 +96,40 @@ class TileFactory:
         self.tile_properties[tile_name]["collide"] = collide
         self.tile_properties[tile_name]["wall"] = wall
         self.tile_properties[tile_name]["rarity"] = rarity
+        self.tile_palettes[tile_name] = build_palette(color, TILE_SIZE_X, TILE_SIZE_Y)
+        if tile_name not in self.tile_ids:
+            self.tile_ids[tile_name] = len(self.tile_names)
+            self.tile_names.append(tile_name)
+        self.build_tables()
+
+    def build_tables(self):
+        """Rebuild the per-id lookup arrays after tile definitions change."""
+        self.wall_table = np.array([self.tile_properties[name]["wall"] == 1 for name in self.tile_names], dtype=bool)
+        self.floor_table = np.array([self.tile_properties[name]["wall"] == 0 for name in self.tile_names], dtype=bool)
+        self.rarity_table = np.array([self.tile_properties[name]["rarity"] for name in self.tile_names], dtype=float)
+        self.collide_table = np.array([self.tile_properties[name]["collide"] != 0 for name in self.tile_names], dtype=bool)
+        self.palette_colors = None
+
+    def id_dtype(self):
+        """Smallest unsigned integer type able to hold every registered tile id."""
+        return np.uint8 if len(self.tile_names) <= 256 else np.uint16
+
+    def get_tile_image_by_id(self, tile_id, level=BRIGHTNESS_LEVELS):
+        return self.tile_palettes[self.tile_names[tile_id]][level]
+
+    def get_tile_image(self, tile_type, level=BRIGHTNESS_LEVELS):
+        """Return the pre-dimmed image of a tile type at a brightness level (0..BRIGHTNESS_LEVELS)."""
+        return self.tile_palettes[tile_type][level]
+
+    def get_palette_colors(self):
+        """Return pre-dimmed colors as a uint8 array indexed [tile id, brightness level, channel]."""
+        if self.palette_colors is None:
+            colors = np.zeros((len(self.tile_ids), BRIGHTNESS_LEVELS + 1, 3), dtype=np.uint8)
+            for name, tile_id in self.tile_ids.items():
+                for level, surface in enumerate(self.tile_palettes[name]):
+                    colors[tile_id, level] = tuple(surface.get_at((0, 0)))[:3]
+            self.palette_colors = colors
+        return self.palette_colors
 
     def create_tile(self, tile_type, tile_x, tile_y):
         """Create a tile instance in tile units."""
@@ -71,7 +138,8 @@ class TileFactory:
             collide = self.tile_properties[tile_type]["collide"]
             wall = self.tile_properties[tile_type]["wall"]
             rarity = self.tile_properties[tile_type]["rarity"]
-            new_tile = self.tile_classes[tile_type](tile_x, tile_y, tile_type, color, collide, wall, rarity)
+            image = self.get_tile_image(tile_type)
+            new_tile = self.tile_classes[tile_type](tile_x, tile_y, tile_type, color, collide, wall, rarity, image)
             self.tile_instances.append(new_tile)
             return new_tile
         else:
@@ -81,6 +149,10 @@ class TileFactory:
         """Return all created tile instances."""
         return self.tile_instances
 
+    def release_instances(self):
+        """Forget the tile instances created so far, e.g. those of a floor that was left."""
+        self.tile_instances = []
+
 factory = TileFactory()
 factory.load_tile_definitions(os.path.abspath("src/config/tiles.yaml"))
 
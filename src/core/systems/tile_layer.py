@@ -0,0 +1,69 @@
+import pygame
+from config import TILE_SIZE_X, TILE_SIZE_Y, TILE_CHUNK_SIZE
+from core.systems.tile import factory
+
+class TileLayer:
+    """Pre-rendered, fully lit dungeon floor split into fixed-size chunk surfaces.
+
+    Chunks are rendered the first time they come into view and only re-rendered
+    after the dungeon reports a tile change inside them.
+    """
+
+    def __init__(self, dungeon, chunk_size=TILE_CHUNK_SIZE):
+        self.dungeon = dungeon
+        self.chunk_size = chunk_size
+        self.chunk_width = chunk_size * TILE_SIZE_X
+        self.chunk_height = chunk_size * TILE_SIZE_Y
+        self.chunks = {}
+        self.dirty = set()
+
+        dungeon.tile_listeners.append(self.mark_dirty)
+        dungeon.unload_listeners.append(self.forget)
+
+    def mark_dirty(self, tile_x, tile_y):
+        """Schedule the chunk holding a tile for re-rendering."""
+        key = (tile_x // self.chunk_size, tile_y // self.chunk_size)
+        if key in self.chunks:
+            self.dirty.add(key)
+
+    def forget(self, left, top, right, bottom):
+        """Drop the chunk surfaces covering an area the dungeon unloaded."""
+        for chunk_y in range(top // self.chunk_size, (bottom - 1) // self.chunk_size + 1):
+            for chunk_x in range(left // self.chunk_size, (right - 1) // self.chunk_size + 1):
+                self.chunks.pop((chunk_x, chunk_y), None)
+                self.dirty.discard((chunk_x, chunk_y))
+
+    def render_chunk(self, chunk_x, chunk_y):
+        surface = self.chunks.get((chunk_x, chunk_y))
+        if surface is None:
+            surface = pygame.Surface((self.chunk_width, self.chunk_height))
+            self.chunks[(chunk_x, chunk_y)] = surface
+        surface.fill((0, 0, 0))
+
+        start_x = chunk_x * self.chunk_size
+        start_y = chunk_y * self.chunk_size
+        end_x = min(start_x + self.chunk_size, self.dungeon.width)
+        end_y = min(start_y + self.chunk_size, self.dungeon.height)
+
+        rows = self.dungeon.grid_window(start_x, start_y, end_x, end_y).tolist()
+        for ty, row in enumerate(rows):
+            for tx, tile_id in enumerate(row):
+                surface.blit(factory.get_tile_image_by_id(tile_id), (tx * TILE_SIZE_X, ty * TILE_SIZE_Y))
+        return surface
+
+    def draw(self, surface, camera):
+        """Blit every chunk intersecting the camera rect onto the surface."""
+        view = camera.camera
+        first_x = max(view.left // self.chunk_width, 0)
+        first_y = max(view.top // self.chunk_height, 0)
+        last_x = (view.right - 1) // self.chunk_width
+        last_y = (view.bottom - 1) // self.chunk_height
+
+        for chunk_y in range(first_y, last_y + 1):
+            for chunk_x in range(first_x, last_x + 1):
+                key = (chunk_x, chunk_y)
+                chunk = self.chunks.get(key)
+                if chunk is None or key in self.dirty:
+                    chunk = self.render_chunk(chunk_x, chunk_y)
+                    self.dirty.discard(key)
+                surface.blit(chunk, (chunk_x * self.chunk_width - view.x, chunk_y * self.chunk_height - view.y))
@@ -2,22 +2,25 @@ import pygame
 import sys
 import random
 from core.systems.camera import Camera
-from core.systems.dungeon import Dungeon
+from core.systems.dungeon import Dungeon, generator_settings_of
+from core.systems.chunked_world import ChunkedDungeon
+from core.systems.floor_cache import FloorCache
+from core.systems.floor_pregen import FloorPregenerator
+from core.systems.game_loop import step_floor
+from core.systems.job import TimeSlicedJob
+from core.systems.memory_report import floor_memory_report, format_memory_report
 from core.systems.resource_manager import load_resources
-from core.systems.renderer import Renderer
+from core.systems.renderer import create_renderer
 from core.objects.player import Player
-from core.objects.stairs import Stairs
-from core.objects.item import Item
-from core.objects.statics import Static
 from config import *
-from ai.game_director import generate_yaml
-import threading
+from ai.director_config import LAYOUT_SECTIONS
+from ai.director_prefetch import DirectorPrefetcher
 import time
-from core.objects.enemy import Enemy
-
-result_lock = threading.Lock()
+import tracemalloc
 
 def main():
+    if MEMORY_REPORT:
+        tracemalloc.start()
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("AI Dungeon Master")
@@ -31,12 +34,17 @@ def main():
     virtual_height = view_distance * TILE_SIZE_Y
     virtual_screen = pygame.Surface((virtual_width, virtual_height))
     global renderer
-    renderer = Renderer(screen, None)
+    renderer = create_renderer(RENDER_BACKEND, screen, None)
 
-    game_state = "loading"
-    result_container = {}
+    floor_cache = FloorCache(FLOOR_CACHE_DIR)
+    # Each floor gets its own seed, reproducible when WORLD_SEED is set
+    world_rng = random.Random(WORLD_SEED)
+    next_seed = world_rng.randrange(2**32)
+    pregenerator = FloorPregenerator(floor_cache)
 
-    threading.Thread(target=request_gpt_data_async, args=(1, 1, 0, 20, "None", result_container), daemon=True).start()
+    game_state = "loading"
+    director = DirectorPrefetcher()
+    director_request = director.take(1, 1, 0, 20, "None")
 
     current_floor = 1
 
@@ -49,22 +57,41 @@ def main():
         message_text = f"{name} - Floor {floor_number}"
         message_start_time = pygame.time.get_ticks()
 
-    def create_floor(rooms, room_min_size, room_max_size, player=None):
-        dungeon = Dungeon(rooms, room_min_size, room_max_size)
+    def begin_floor(rooms, room_min_size, room_max_size, settings, definitions_ready):
+        """Start building the next floor; the loading screen runs the job a slice per frame."""
+        if CHUNKED_WORLD:
+            dungeon = ChunkedDungeon(seed=next_seed, deferred=True, settings=settings,
+                                     definitions_ready=definitions_ready)
+        else:
+            dungeon = Dungeon(rooms, room_min_size, room_max_size, seed=next_seed, floor_cache=floor_cache,
+                              pregenerator=pregenerator, deferred=True, settings=settings,
+                              definitions_ready=definitions_ready)
+        return dungeon, TimeSlicedJob(dungeon.build_job)
+
+    def create_floor(dungeon, player=None):
+        nonlocal next_seed
+        # Generate the next floor in the background while this one is played; with prefetching
+        # that starts once the director's guess for the next floor has its dungeon settings
+        next_seed = world_rng.randrange(2**32)
+        if not CHUNKED_WORLD and not DIRECTOR_PREFETCH:
+            pregenerator.start(next_seed, dungeon.generator_settings())
+
         spawn_x, spawn_y = dungeon.find_spawn_point()
         if player:
-            player.x = spawn_x
-            player.y = spawn_y
-            player.dungeon = dungeon
+            old_dungeon = player.dungeon
+            player.enter_dungeon(dungeon, spawn_x, spawn_y)
             player.kills = 0
+            # Nothing of the previous floor is needed any more
+            old_dungeon.teardown()
+            del old_dungeon
         else:
             player = Player(dungeon, spawn_x, spawn_y)
         camera = Camera(view_distance, dungeon.width, dungeon.height)
-        dungeon.all_entities.append(player)
+        dungeon.add_entity(player)
         renderer.camera = camera
+        renderer.reset()
 
         show_floor_message(current_floor, dungeon.name)
-
         return dungeon, player, camera
 
     rooms = random.randint(5, 10)
@@ -75,23 +102,39 @@ def main():
     player = None
     camera = None
 
+    floor_job = None
+
     running = True
     while running:
-        pygame.event.pump()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
 
         if game_state == "loading":
-                if "data" in result_container:
-                    with result_lock:
-                        dungeon, player, camera = create_floor(rooms, room_min_size, room_max_size, player)
-
-                        for ent in dungeon.all_entities:
-                            if isinstance(ent, Enemy):
-                                while ent.distance_to(player) < 10:
-                                    x, y = dungeon.get_random_spawn_point()
-                                    ent.x = x
-                                    ent.y = y
-
-                        game_state = "playing"
+                if director_request.error() is not None:
+                    # Raised on the director's worker thread; only the game's own thread ends the game
+                    print(f"The game director failed: {director_request.error()}. Exiting program.")
+                    running = False
+                    continue
+
+                if floor_job is None and director_request.has(*LAYOUT_SECTIONS):
+                    # The layout starts from tiles and dungeon settings while the rest still streams in;
+                    # factories only change here and in the floor job, never while a floor is played
+                    director_request.apply_arrived()
+                    next_dungeon, floor_job = begin_floor(rooms, room_min_size, room_max_size,
+                                                          director_request.sections["dungeon"][0],
+                                                          director_request.apply_arrived)
+
+                if floor_job is not None and floor_job.run(FLOOR_BUILD_BUDGET_MS):
+                    dungeon, player, camera = create_floor(next_dungeon, player)
+                    floor_job = None
+                    game_state = "playing"
+                    if MEMORY_REPORT:
+                        # Only now does nothing refer to the previous floor any more
+                        report = floor_memory_report(dungeon, renderer)
+                        print(format_memory_report(current_floor, report))
+                        if report["live_dungeons"] != 1:
+                            print(f"The previous floor was not released: {report['live_dungeons']} floors in memory")
                 else:
                     virtual_screen.fill((0, 0, 0))
                     font = pygame.font.Font(None, 36)
@@ -104,49 +147,35 @@ def main():
                     clock.tick(60)
                     continue
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-
         # Update entities and camera
-        player.update()
+        reached_stairs = step_floor(dungeon, player)
+        if player.dead:
+            running = False
         camera.update(player)
-
-        # Check for stairs collision
-        for ent in dungeon.all_entities:
-            if isinstance(ent, Player):
-                continue
-
-            if ent.distance_to(player) < 30:
-                if isinstance(ent, Stairs) and ent.rect.colliderect(player.rect):
-                    print("Reached stairs! Next floor is: ", current_floor + 1)
-
-                    game_state = "loading"
-                    result_container = {}
-                    threading.Thread(target=request_gpt_data_async, args=(current_floor + 1, player.level, player.kills, player.current_health, dungeon.theme, result_container), daemon=True).start()
-                    current_floor += 1
-                    
-                if isinstance(ent, Item):
-                    if ent.rect.colliderect(player.rect):
-                        if player.equip_item(ent):
-                            dungeon.all_entities.remove(ent)
-
-                if isinstance(ent, Static):
-                    if ent.distance_to(player) < 3:
-                        if random.random() < 0.01:
-                            ent.interact(player)
-                    
-                ent.update()
+        dungeon.stream(camera)
+        if DIRECTOR_PREFETCH:
+            # Guess the next floor's request from how the player is doing right now
+            director.prefetch(current_floor + 1, player.level, player.kills, player.current_health, dungeon.theme)
+            guess = director.guess()
+            if not CHUNKED_WORLD and guess is not None and guess.has("dungeon"):
+                next_settings = generator_settings_of(guess.sections["dungeon"][0])
+                if not pregenerator.matches(next_settings):
+                    pregenerator.start(next_seed, next_settings)
+
+        if reached_stairs:
+            print("Reached stairs! Next floor is: ", current_floor + 1)
+
+            game_state = "loading"
+            director_request = director.take(current_floor + 1, player.level, player.kills, player.current_health, dungeon.theme)
+            current_floor += 1
 
         renderer.render(dungeon, player, virtual_screen, message_text, message_start_time, message_duration)
         clock.tick(60)
 
+    pregenerator.shutdown()
+    director.shutdown()
     pygame.quit()
     sys.exit()
 
-def request_gpt_data_async(floor, level, kills, health, theme, result_container):
-    result = generate_yaml(floor, level, kills, health, theme)
-    result_container["data"] = result
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
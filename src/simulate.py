@@ -0,0 +1,116 @@
+import argparse
+import contextlib
+import multiprocessing
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Run without a window, e.g. `python src/simulate.py --seeds 64`
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from config import *
+from core.systems.bot import BotController
+from core.systems.dungeon import Dungeon
+from core.systems.game_clock import SimulatedClock, use_clock
+from core.systems.game_loop import step_floor
+from core.systems.tile import factory
+from core.objects.enemy import enemy_factory
+from core.objects.item import item_factory
+from core.objects.statics import static_factory
+from core.objects.player import Player
+
+# Dungeon settings of the loaded definitions, see load_yaml_definitions
+settings_file = None
+
+def load_yaml_definitions(directory):
+    """Load tiles.yaml, enemies.yaml, items.yaml, statics.yaml and dungeon.yaml from a directory."""
+    global settings_file
+    factory.clear()
+    factory.load_tile_definitions(os.path.join(directory, "tiles.yaml"))
+    enemy_factory.load_enemy_definitions(os.path.join(directory, "enemies.yaml"))
+    item_factory.load_item_definitions(os.path.join(directory, "items.yaml"))
+    static_factory.load_static_definitions(os.path.join(directory, "statics.yaml"))
+    settings_file = os.path.join(directory, "dungeon.yaml")
+
+
+def simulate_floor(seed, ticks=SIM_TICKS):
+    """Let a bot play one floor for at most ticks frames of game time and report how it went."""
+    # Wandering enemies and Static interactions draw from the global generator
+    random.seed(seed)
+    clock = SimulatedClock()
+    use_clock(clock)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        dungeon = Dungeon(seed=seed, settings_file=settings_file)
+        spawn_x, spawn_y = dungeon.find_spawn_point()
+        player = Player(dungeon, spawn_x, spawn_y, controller=BotController())
+        dungeon.add_entity(player)
+
+        stairs_tick = None
+        for tick in range(1, ticks + 1):
+            clock.advance()
+            if step_floor(dungeon, player):
+                stairs_tick = tick
+                break
+            if player.dead:
+                break
+        dungeon.teardown()
+
+    return {
+        "seed": seed,
+        "kills": player.kills,
+        "damage_taken": player.damage_taken,
+        "died": player.dead,
+        "level": player.level,
+        "stairs_tick": stairs_tick,
+    }
+
+
+def run_sweep(directory, seeds, ticks=SIM_TICKS, workers=None):
+    """Simulate every seed over a pool of processes, each loading the definitions once."""
+    if workers == 1:
+        load_yaml_definitions(directory)
+        return [simulate_floor(seed, ticks) for seed in seeds]
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=load_yaml_definitions, initargs=(directory,)) as executor:
+        return list(executor.map(simulate_floor, seeds, [ticks] * len(seeds), chunksize=4))
+
+
+def summarize(results):
+    """Aggregate the reports of simulate_floor into one line per statistic."""
+    floors = len(results)
+    escaped = [result["stairs_tick"] for result in results if result["stairs_tick"] is not None]
+    kills = [result["kills"] for result in results]
+    damage = [result["damage_taken"] for result in results]
+    lines = [
+        f"       floors: {floors}",
+        f"reached stairs: {len(escaped)} ({len(escaped) / floors:.0%})",
+        f"         died: {sum(result['died'] for result in results)}",
+        f"        kills: mean {statistics.mean(kills):.2f}, max {max(kills)}",
+        f" damage taken: mean {statistics.mean(damage):.2f}, max {max(damage)}",
+    ]
+    if escaped:
+        # A tick is one frame at 60 frames per second
+        seconds = [tick / 60 for tick in escaped]
+        lines.append(f"time to stairs: mean {statistics.mean(seconds):.1f} s, median {statistics.median(seconds):.1f} s")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play many floors headlessly with a bot and report balance statistics.")
+    parser.add_argument("--definitions", default=os.path.abspath("src/config"),
+                        help="directory holding tiles.yaml, enemies.yaml, items.yaml, statics.yaml and dungeon.yaml")
+    parser.add_argument("--seeds", type=int, default=SIM_SEEDS, help="number of floors to play")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--ticks", type=int, default=SIM_TICKS, help="frames each floor runs at most")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use, 1 to stay in this process")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run_sweep(args.definitions, range(args.first_seed, args.first_seed + args.seeds), args.ticks, args.workers)
+    print(summarize(results))
+    print(f"     wall time: {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,77 @@
+import os
+import random
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.systems.dungeon_generator import DungeonGenerator
+from core.systems.tile import factory
+
+
+def soften_cell(grid, x, y):
+    """The per-cell rule soften_edges used before it was vectorized.
+
+    Its fallback to a random tile never applies here: with every tile a wall
+    or a floor, a cell always has a neighbour of the class it turns into.
+    """
+    height, width = grid.shape
+    tile = grid[y, x]
+    if factory.floor_table[tile]:
+        return int(tile)
+
+    wall_count = 0
+    nearest_floor = nearest_wall = None
+    for j in range(-1, 2):
+        for i in range(-1, 2):
+            if i == 0 and j == 0:
+                continue
+            nx, ny = x + i, y + j
+            if not (0 <= nx < width and 0 <= ny < height):
+                wall_count += 1
+                continue
+            neighbour = int(grid[ny, nx])
+            if factory.wall_table[neighbour]:
+                wall_count += 1
+                if nearest_wall is None:
+                    nearest_wall = neighbour
+            elif factory.floor_table[neighbour] and nearest_floor is None:
+                nearest_floor = neighbour
+    return nearest_floor if wall_count <= 5 else nearest_wall
+
+
+def random_grid(width, height, seed, floor_share):
+    rng = np.random.default_rng(seed)
+    walls, floors = np.flatnonzero(factory.wall_table), np.flatnonzero(factory.floor_table)
+    grid = np.where(rng.random((height, width)) < floor_share,
+                    rng.choice(floors, size=(height, width)), rng.choice(walls, size=(height, width)))
+    return grid.astype(factory.id_dtype())
+
+
+def smoothed(grid, smoothing=1):
+    generator = DungeonGenerator(width=grid.shape[1], height=grid.shape[0], smoothing=smoothing, rng=random.Random(0))
+    generator.grid = grid.copy()
+    generator.soften_edges()
+    return generator.grid
+
+
+def test_soften_edges_matches_per_cell_rule():
+    for seed, floor_share in ((1, 0.3), (2, 0.5), (3, 0.7)):
+        grid = random_grid(37, 23, seed, floor_share)
+        result = smoothed(grid)
+        for y in range(grid.shape[0]):
+            for x in range(grid.shape[1]):
+                assert result[y, x] == soften_cell(grid, x, y), (x, y)
+
+
+def test_soften_edges_repeats_per_smoothing_pass():
+    grid = random_grid(30, 30, 4, 0.6)
+    once = smoothed(grid)
+    assert (smoothed(grid, smoothing=2) == smoothed(once)).all()
+
+
+def test_soften_edges_keeps_floors():
+    grid = random_grid(25, 25, 5, 0.5)
+    floors = factory.floor_table[grid]
+    assert (smoothed(grid)[floors] == grid[floors]).all()
@@ -0,0 +1,76 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from config import FLOOR_CACHE_ENTRIES
+from core.systems.floor_cache import FloorCache, cached_floor_layout, definitions_hash
+from core.systems.floor_layout import generate_floor_layout
+
+SETTINGS = {"width": 60, "height": 50, "num_rooms": 6, "room_min_size": 4, "room_max_size": 8,
+            "wiggly": False, "smoothing": 1, "scalable": False}
+
+
+def layout_data(layout):
+    """A FloorLayout as plain values, for comparing two layouts."""
+    rooms = [(room.x, room.y, room.width, room.height) for room in layout.rooms]
+    corridors = [tuple(int(i) for i in corridor) for corridor in layout.corridors]
+    goal = tuple(int(i) for i in layout.goal)
+    spawns = [(kind, str(name), int(x), int(y)) for kind, name, x, y in layout.spawns]
+    return layout.seed, layout.grid.dtype, layout.grid.tolist(), rooms, corridors, goal, spawns
+
+
+def test_same_seed_gives_same_layout():
+    first = generate_floor_layout(SETTINGS, 7)
+    assert layout_data(generate_floor_layout(SETTINGS, 7)) == layout_data(first)
+    assert generate_floor_layout(SETTINGS, 8).grid.tolist() != first.grid.tolist()
+
+
+def test_scalable_layout_is_deterministic():
+    settings = dict(SETTINGS, scalable=True)
+    assert layout_data(generate_floor_layout(settings, 3)) == layout_data(generate_floor_layout(settings, 3))
+
+
+def test_round_trip_is_lossless(tmp_path):
+    cache = FloorCache(str(tmp_path))
+    layout = generate_floor_layout(SETTINGS, 11)
+    assert layout.spawns
+    digest = definitions_hash(SETTINGS)
+    cache.store(layout, digest)
+    assert layout_data(cache.load(11, digest)) == layout_data(layout)
+    # Another seed or other definitions miss
+    assert cache.load(12, digest) is None
+    assert cache.load(11, definitions_hash(dict(SETTINGS, num_rooms=7))) is None
+
+
+def test_cached_layout_matches_generated(tmp_path):
+    cache = FloorCache(str(tmp_path))
+    generated = cached_floor_layout(SETTINGS, 5, cache)
+    assert len(os.listdir(tmp_path)) == 1
+    assert layout_data(cached_floor_layout(SETTINGS, 5, cache)) == layout_data(generated)
+    assert layout_data(generated) == layout_data(generate_floor_layout(SETTINGS, 5))
+
+
+def test_unreadable_entry_is_ignored(tmp_path):
+    cache = FloorCache(str(tmp_path))
+    digest = definitions_hash(SETTINGS)
+    with open(cache.path_for(1, digest), "wb") as file:
+        file.write(b"not a layout")
+    assert cache.load(1, digest) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    assert FLOOR_CACHE_ENTRIES == 64
+    cache = FloorCache(str(tmp_path))
+    layout = generate_floor_layout(dict(SETTINGS, width=30, height=30, num_rooms=2), 1)
+    for index in range(FLOOR_CACHE_ENTRIES):
+        cache.store(layout, str(index))
+        os.utime(cache.path_for(1, str(index)), (index, index))
+    # Loading the oldest entry makes it the most recently used
+    assert cache.load(1, "0") is not None
+
+    cache.store(layout, "new")
+    assert len(os.listdir(tmp_path)) == FLOOR_CACHE_ENTRIES
+    assert not os.path.exists(cache.path_for(1, "1"))
+    for digest in ("0", "2", "new"):
+        assert os.path.exists(cache.path_for(1, digest))
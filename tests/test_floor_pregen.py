@@ -0,0 +1,113 @@
+import copy
+import os
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.objects.enemy import enemy_factory
+from core.objects.item import item_factory
+from core.systems.floor_layout import current_definitions, generate_floor_layout, load_definitions, spawn_requests
+from core.systems.floor_pregen import FloorPregenerator, fit_layout
+from core.systems.tile import Tile, factory
+
+SETTINGS = {"width": 70, "height": 60, "num_rooms": 8, "room_min_size": 4, "room_max_size": 9,
+            "wiggly": False, "smoothing": 1, "scalable": False}
+
+
+@pytest.fixture
+def provisional():
+    """A layout and the definitions it was generated from; the definitions are restored afterwards."""
+    definitions = current_definitions(SETTINGS)
+    snapshot = copy.deepcopy(definitions)
+    yield generate_floor_layout(SETTINGS, 21), definitions
+    load_definitions(snapshot)
+
+
+def rooms_of(layout):
+    return [(room.x, room.y, room.width, room.height) for room in layout.rooms]
+
+
+def assert_fits(fitted, layout):
+    assert rooms_of(fitted) == rooms_of(layout)
+    assert fitted.corridors == layout.corridors and fitted.goal == layout.goal
+    # Walls and floors keep their shape
+    assert (factory.wall_table[fitted.grid] == factory.wall_table[layout.grid]).all()
+    walkable = ~factory.collide_table[fitted.grid]
+    assert all(walkable[y, x] for _, _, x, y in fitted.spawns)
+    assert len({(x, y) for _, _, x, y in fitted.spawns}) == len(fitted.spawns)
+    assert Counter((kind, name) for kind, name, _, _ in fitted.spawns) == Counter(spawn_requests())
+
+
+def test_unchanged_definitions_keep_the_layout(provisional):
+    layout, definitions = provisional
+    assert fit_layout(layout, definitions, SETTINGS) is layout
+
+
+def test_new_floor_tile_keeps_rooms_and_spawns(provisional):
+    layout, definitions = provisional
+    factory.register_tile("Moss Floor", Tile, (40, 120, 40), False, False, 1000)
+    fitted = fit_layout(layout, definitions, SETTINGS)
+    assert_fits(fitted, layout)
+    moss = factory.tile_ids["Moss Floor"]
+    assert (fitted.grid == moss).any()
+    # The walls were not retiled
+    walls = factory.wall_table[layout.grid]
+    assert (fitted.grid[walls] == layout.grid[walls]).all()
+    assert fitted.spawns == layout.spawns
+
+
+def test_new_collide_floor_moves_spawns_off_it(provisional):
+    layout, definitions = provisional
+    factory.register_tile("Rubble", Tile, (90, 80, 70), True, False, 30)
+    fitted = fit_layout(layout, definitions, SETTINGS)
+    rubble = fitted.grid == factory.tile_ids["Rubble"]
+    # Some floors, and spawns on them, were retiled to rubble
+    assert any(rubble[y, x] for _, _, x, y in layout.spawns)
+    assert_fits(fitted, layout)
+
+
+def test_changed_amounts_are_redrawn(provisional):
+    layout, definitions = provisional
+    enemies = copy.deepcopy(enemy_factory.enemy_definitions)
+    enemies[0]["amount"] = enemies[0].get("amount", 0) + 4
+    enemies[1]["amount"] = 0
+    enemy_factory.enemy_definitions = enemies
+    items = copy.deepcopy(item_factory.item_definitions)
+    items[0]["amount"] = items[0].get("amount", 0) + 2
+    item_factory.item_definitions = items
+
+    fitted = fit_layout(layout, definitions, SETTINGS)
+    assert_fits(fitted, layout)
+    assert (fitted.grid == layout.grid).all()
+    # Spawns that are still asked for stay where they were
+    kept = Counter(fitted.spawns) & Counter(layout.spawns)
+    assert sum(kept.values()) == len(layout.spawns) - sum(
+        1 for kind, name, _, _ in layout.spawns if kind == "enemy" and name == enemies[1]["type"])
+
+
+def test_changed_settings_regenerate(provisional):
+    layout, definitions = provisional
+    settings = dict(SETTINGS, num_rooms=5)
+    fitted = fit_layout(layout, definitions, settings)
+    assert rooms_of(fitted) == rooms_of(generate_floor_layout(settings, 21))
+
+
+class BrokenExecutor:
+    def submit(self, *args):
+        raise RuntimeError("cannot schedule new futures after shutdown")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_start_recovers_from_a_broken_pool():
+    pregenerator = FloorPregenerator()
+    pregenerator.executor = BrokenExecutor()
+    pregenerator.start(1, SETTINGS)
+    assert pregenerator.future is None and pregenerator.ready()
+    assert pregenerator.take(SETTINGS) is None
+    assert not isinstance(pregenerator.executor, BrokenExecutor)
+    pregenerator.shutdown()
@@ -0,0 +1,93 @@
+import contextlib
+import io
+import os
+import random
+import sys
+from collections import deque
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.systems.dungeon import Dungeon
+from core.systems.flow_field import FlowField
+from core.systems.tile import factory
+
+
+class Target:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+@pytest.fixture(scope="module")
+def dungeon():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Dungeon(seed=3)
+
+
+def bfs_distances(dungeon, start):
+    """Steps from start to every reachable non-wall tile, over the whole floor."""
+    walls = factory.wall_table[dungeon.grid]
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if (0 <= nx < dungeon.width and 0 <= ny < dungeon.height and (nx, ny) not in distances
+                    and not walls[ny, nx]):
+                distances[(nx, ny)] = distances[(x, y)] + 1
+                queue.append((nx, ny))
+    return distances
+
+
+def floor_tiles(dungeon, count, seed):
+    walls = factory.wall_table[dungeon.grid]
+    tiles = [(x, y) for y in range(dungeon.height) for x in range(dungeon.width) if not walls[y, x]]
+    return random.Random(seed).sample(tiles, count)
+
+
+def assert_matches_bfs(dungeon, field, target_tile):
+    expected = bfs_distances(dungeon, target_tile)
+    tx, ty = target_tile
+    for y in range(ty - field.radius - 1, ty + field.radius + 2):
+        for x in range(tx - field.radius - 1, tx + field.radius + 2):
+            distance = expected.get((x, y))
+            if distance is None or distance > field.radius:
+                assert field.distance_at(x, y) is None, (x, y)
+                assert field.next_tile(x, y) is None, (x, y)
+                continue
+            assert field.distance_at(x, y) == distance, (x, y)
+            next_tile = field.next_tile(x, y)
+            if distance == 0:
+                assert next_tile is None
+            else:
+                # One step away and one step closer: on a shortest path to the target
+                assert abs(next_tile[0] - x) + abs(next_tile[1] - y) == 1
+                assert expected[next_tile] == distance - 1, (x, y)
+
+
+@pytest.mark.parametrize("radius", [5, 12, 32])
+def test_next_tile_is_on_a_shortest_path(dungeon, radius):
+    field = FlowField(dungeon, radius=radius)
+    for target_tile in floor_tiles(dungeon, 4, radius):
+        field.update(Target(target_tile[0] + 0.5, target_tile[1] + 0.25))
+        assert_matches_bfs(dungeon, field, target_tile)
+
+
+def test_field_follows_tile_changes(dungeon):
+    field = FlowField(dungeon, radius=10)
+    tx, ty = next((x, y) for x, y in floor_tiles(dungeon, 50, 0) if not dungeon.wall_mask[y, x - 1])
+    field.update(Target(tx, ty))
+    assert field.next_tile(tx - 1, ty) == (tx, ty)
+
+    # Wall off the floor tile left of the target
+    old_type = dungeon.tile_type_at(tx - 1, ty)
+    dungeon.set_tile(tx - 1, ty, factory.tile_names[int(factory.wall_table.nonzero()[0][0])])
+    try:
+        field.update(Target(tx, ty))
+        assert field.distance_at(tx - 1, ty) is None
+        assert_matches_bfs(dungeon, field, (tx, ty))
+    finally:
+        dungeon.set_tile(tx - 1, ty, old_type)
@@ -0,0 +1,146 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from ai.director_schema import repair_entry, repair_section
+from ai.director_stream import DocumentSplitter
+
+# The .get(...) fallbacks of EnemyFactory, ItemFactory and StaticFactory
+ENEMY_DEFAULTS = {"name": "Unnamed Enemy", "health": 10, "damage": 2, "speed": 0.01, "armor": 0,
+                  "vision_radius": 5, "xp": 1, "color": [255, 0, 0]}
+STATIC_DEFAULTS = {"name": "Unnamed Static", "health": 10, "class": "Torch", "area": 5, "damage": 2,
+                   "cooldown": 5000, "color": [255, 255, 0]}
+ITEM_DEFAULTS = {"description": "No description", "rarity": "common"}
+WEAPON_DEFAULTS = {"damage": 0, "speed": 1, "area": 1, "class": "melee"}
+ARMOR_DEFAULTS = {"defense": 0, "movespeed": 1, "class": "light"}
+
+TILES = [
+    {"name": "Stone Wall", "color": [90, 90, 90], "collide": 1, "wall": 1, "rarity": 50},
+    {"name": "Stone Floor", "color": [150, 150, 150], "collide": 0, "wall": 0, "rarity": 50},
+]
+
+
+def test_enemy_defaults_match_factory():
+    enemy = repair_section("enemies", [{"type": "Rat"}])[0]
+    assert {key: enemy[key] for key in ENEMY_DEFAULTS} == ENEMY_DEFAULTS
+
+
+def test_static_defaults_match_factory():
+    static = repair_section("statics", [{"type": "torch"}])[0]
+    assert {key: static[key] for key in STATIC_DEFAULTS} == STATIC_DEFAULTS
+
+
+def test_item_defaults_match_factory():
+    weapon, armor = repair_section("items", [{"name": "Stick", "type": "weapon"},
+                                             {"name": "Rags", "type": "armor"}])
+    assert {key: weapon[key] for key in ITEM_DEFAULTS} == ITEM_DEFAULTS
+    assert {key: weapon[key] for key in WEAPON_DEFAULTS} == WEAPON_DEFAULTS
+    assert {key: armor[key] for key in ARMOR_DEFAULTS} == ARMOR_DEFAULTS
+
+
+def test_items_are_checked_against_their_type():
+    weapon, armor, potion = repair_section("items", [
+        {"name": "Bow", "type": "weapon", "damage": "7", "class": "Ranged", "area": 50},
+        {"name": "Mail", "type": "armor", "defense": "heavy", "movespeed": "0.8"},
+        {"name": "Potion", "type": "potion"},
+    ])
+    assert (weapon["damage"], weapon["class"], weapon["area"]) == (7, "ranged", 10.0)
+    assert "defense" not in weapon
+    assert (armor["defense"], armor["movespeed"]) == (0, 0.8)
+    assert "damage" not in armor
+    assert "damage" not in potion and "defense" not in potion
+
+
+def test_unknown_weapon_class_falls_back():
+    weapon = repair_section("items", [{"name": "Wand", "type": "weapon", "class": "magic"}])[0]
+    assert weapon["class"] == "melee"
+
+
+def test_values_are_coerced_and_clamped():
+    enemy = repair_section("enemies", [{"type": "Rat", "health": "12", "speed": 3, "color": [300, -5, "7"],
+                                        "amount": 1000, "loot": "cheese"}])[0]
+    assert enemy["health"] == 12
+    assert enemy["speed"] == 0.1
+    assert enemy["color"] == [255, 0, 7]
+    assert enemy["amount"] == 20
+    # Keys the schema does not know are kept
+    assert enemy["loot"] == "cheese"
+
+
+def test_repair_entry_leaves_input_untouched():
+    entry = {"type": "Rat", "health": "12"}
+    assert repair_entry("enemies", entry)["health"] == 12
+    assert entry == {"type": "Rat", "health": "12"}
+
+
+def test_entries_missing_required_fields_are_dropped():
+    enemies = repair_section("enemies", [{"name": "Nobody"}, "Rat", {"type": "Bat"}])
+    assert [enemy["type"] for enemy in enemies] == ["Bat"]
+
+
+def test_section_without_usable_entries_raises():
+    with pytest.raises(ValueError):
+        repair_section("enemies", [{"name": "Nobody"}])
+    with pytest.raises(ValueError):
+        repair_section("items", "a sword")
+
+
+def test_single_entry_without_list_is_accepted():
+    assert repair_section("statics", {"type": "Torch"})[0]["type"] == "Torch"
+
+
+def test_duplicates_keep_the_first_entry():
+    enemies = repair_section("enemies", [{"type": "Rat", "health": 3}, {"type": "Rat", "health": 9}])
+    assert [(enemy["type"], enemy["health"]) for enemy in enemies] == [("Rat", 3)]
+
+
+def test_tiles_need_walls_and_floors():
+    assert repair_section("tiles", TILES) == TILES
+    with pytest.raises(ValueError):
+        repair_section("tiles", TILES[:1])
+    with pytest.raises(ValueError):
+        repair_section("tiles", TILES[1:])
+
+
+def test_tile_flags_are_coerced():
+    tiles = repair_section("tiles", [dict(TILES[0], wall="yes", collide=True), dict(TILES[1], wall="false")])
+    assert [(tile["wall"], tile["collide"]) for tile in tiles] == [(1, 1), (0, 0)]
+
+
+def test_dungeon_rooms_fit_the_map():
+    dungeon = repair_section("dungeon", [{"width": 40, "height": 40, "room_min_size": 50, "room_max_size": 30}])[0]
+    assert dungeon["room_max_size"] == 20
+    assert dungeon["room_min_size"] <= dungeon["room_max_size"]
+    assert dungeon["rooms"] == 5
+
+
+def split(text, step=7):
+    """Feed text to a DocumentSplitter in small pieces, as a stream would, and return what it completed."""
+    splitter = DocumentSplitter()
+    completed = []
+    for start in range(0, len(text), step):
+        completed += splitter.feed(text[start:start + step])
+    return completed + splitter.close()
+
+
+def test_splitter_yields_each_document_in_order():
+    text = ("Here is your floor!\n"
+            "```yaml\ntiles:\n"
+            "  - {name: Stone Wall, color: [90, 90, 90], collide: 1, wall: 1}\n"
+            "  - {name: Stone Floor, color: [150, 150, 150], collide: 0, wall: 0}\n"
+            "```\n---\n"
+            "**enemies:**\n  - type: Rat\n    health: '4'\n")
+    completed = split(text)
+    assert [section for section, _ in completed] == ["tiles", "enemies"]
+    assert completed[1][1][0]["health"] == 4
+
+
+def test_splitter_drops_only_the_broken_document():
+    text = ("tiles:\n  - {name: Stone Wall, color: [90, 90, 90], collide: 1, wall: 1}\n"
+            "  - {name: Stone Floor, color: [150, 150, 150], collide: 0, wall: 0}\n"
+            "enemies:\n  - type: [unclosed\n"
+            "items:\n  - {name: Stick, type: weapon}\n")
+    assert [section for section, _ in split(text)] == ["tiles", "items"]
@@ -0,0 +1,65 @@
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from config import BRIGHTNESS_LEVELS
+from core.systems.lighting import Lightmap, light_array
+
+
+def tile_brightness(tile_x, tile_y, light_sources):
+    """The per-tile loop Renderer.get_tile_brightness ran before the lightmap."""
+    brightness = 0.0
+    for light in light_sources:
+        dist = abs(tile_x - light.x) + abs(tile_y - light.y)
+        if dist <= light.light_radius:
+            source_brightness = 1.0
+        else:
+            steps_beyond = dist - light.light_radius
+            if steps_beyond >= 4:
+                source_brightness = 0.0
+            else:
+                source_brightness = 1.0 - (0.25 * steps_beyond)
+        brightness = max(brightness, source_brightness)
+    return brightness
+
+
+def random_lights(seed, count):
+    rng = random.Random(seed)
+    return [SimpleNamespace(x=rng.uniform(-5, 45), y=rng.uniform(-5, 35), light_radius=rng.choice([0, 1, 3, 5.5]))
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize("seed, count", [(1, 1), (2, 4), (3, 12)])
+def test_lightmap_matches_tile_brightness(seed, count):
+    lights = random_lights(seed, count)
+    lightmap = Lightmap()
+    lightmap.build(light_array(lights), 3, 2, 36, 27)
+    for tile_y in range(2, 29):
+        for tile_x in range(3, 39):
+            expected = tile_brightness(tile_x, tile_y, lights)
+            assert lightmap.brightness_at(tile_x, tile_y) == pytest.approx(expected, abs=1e-5), (tile_x, tile_y)
+            assert lightmap.level_at(tile_x, tile_y) == round(expected * BRIGHTNESS_LEVELS)
+
+
+def test_lights_outside_the_window_still_reach_it():
+    # Falloff reaches two tiles into the window, the radius itself does not
+    lights = [SimpleNamespace(x=-3, y=5, light_radius=2)]
+    lightmap = Lightmap()
+    lightmap.build(light_array(lights), 0, 0, 10, 10)
+    for tile_x in range(10):
+        assert lightmap.brightness_at(tile_x, 5) == pytest.approx(tile_brightness(tile_x, 5, lights))
+    assert lightmap.brightness_at(0, 5) == pytest.approx(0.75)
+
+
+def test_no_lights_and_tiles_outside_are_dark():
+    lightmap = Lightmap()
+    lightmap.build(light_array([]), 0, 0, 8, 8)
+    assert lightmap.brightness_at(4, 4) == 0.0
+    lightmap.build(light_array([SimpleNamespace(x=4, y=4, light_radius=3)]), 0, 0, 8, 8)
+    assert lightmap.brightness_at(4, 4) == 1.0
+    assert lightmap.brightness_at(8, 4) == 0.0 and lightmap.level_at(-1, 4) == 0
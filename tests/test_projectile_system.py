@@ -0,0 +1,121 @@
+import contextlib
+import io
+import math
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from config import TILE_SIZE_X, TILE_SIZE_Y
+from core.objects.entity import Entity
+from core.objects.projectile import Projectile
+from core.systems.dungeon import Dungeon
+from core.systems.tile import factory
+
+WALL_X = 70
+START = (50.0, 40.0)
+
+
+class Target(Entity):
+    def __init__(self, dungeon, x, y, health=10):
+        super().__init__(x, y, TILE_SIZE_X, TILE_SIZE_Y, (255, 0, 0), dungeon)
+        self.health = health
+        self.hits = []
+
+    def take_damage(self, amount, owner):
+        self.health -= amount
+        self.hits.append((amount, owner))
+
+
+@pytest.fixture
+def dungeon():
+    """An open floor with a single wall column at WALL_X and no entities."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        dungeon = Dungeon(seed=1)
+    for entity in list(dungeon.all_entities):
+        dungeon.remove_entity(entity)
+    floor = int(factory.floor_table.nonzero()[0][0])
+    wall = int(factory.wall_table.nonzero()[0][0])
+    dungeon.grid[:] = floor
+    dungeon.grid[:, WALL_X] = wall
+    dungeon.build_masks()
+    return dungeon
+
+
+def run_reference(dungeon, direction, ticks=400, **kwargs):
+    """Positions per tick of a Projectile until it is destroyed."""
+    projectile = Projectile(dungeon, *START, *direction, **kwargs)
+    dungeon.add_entity(projectile)
+    trace = []
+    for _ in range(ticks):
+        projectile.update()
+        if projectile not in dungeon.spatial:
+            break
+        trace.append((projectile.x, projectile.y))
+    return trace
+
+
+def run_system(dungeon, direction, ticks=400, **kwargs):
+    """Positions per tick of the same projectile in the ProjectileSystem until it is dropped."""
+    dungeon.projectiles.spawn(*START, *direction, **kwargs)
+    trace = []
+    for _ in range(ticks):
+        dungeon.projectiles.update()
+        if len(dungeon.projectiles) == 0:
+            break
+        trace.append((dungeon.projectiles.x[0], dungeon.projectiles.y[0]))
+    return trace
+
+
+def assert_same_trace(reference, system):
+    assert len(system) == len(reference)
+    for (x, y), (expected_x, expected_y) in zip(system, reference):
+        assert x == pytest.approx(expected_x) and y == pytest.approx(expected_y)
+
+
+@pytest.mark.parametrize("angle", [0, 30, 90, 135, 180, 250])
+def test_range_matches_projectile(dungeon, angle):
+    direction = (math.cos(math.radians(angle)), math.sin(math.radians(angle)))
+    kwargs = dict(speed=0.3, range_in_tiles=6, damage=2)
+    reference = run_reference(dungeon, direction, **kwargs)
+    assert_same_trace(reference, run_system(dungeon, direction, **kwargs))
+
+
+def test_wall_hit_matches_projectile(dungeon):
+    kwargs = dict(speed=0.5, range_in_tiles=100, damage=2)
+    reference = run_reference(dungeon, (1, 0), **kwargs)
+    # Stopped by the wall column rather than its range
+    assert reference[-1][0] < WALL_X and len(reference) < 100
+    assert_same_trace(reference, run_system(dungeon, (1, 0), **kwargs))
+
+
+@pytest.mark.parametrize("angle", [0, 45, 200])
+def test_stall_matches_projectile(dungeon, angle):
+    # As Static.explode fires them: slowing down until they stall
+    direction = (math.cos(math.radians(angle)), math.sin(math.radians(angle)))
+    kwargs = dict(speed=0.1, range_in_tiles=15, damage=2, acceleration=-0.1)
+    reference = run_reference(dungeon, direction, **kwargs)
+    # Stalled before reaching either its range or the wall
+    assert math.hypot(reference[-1][0] - START[0], reference[-1][1] - START[1]) < 10
+    assert_same_trace(reference, run_system(dungeon, direction, **kwargs))
+
+
+def test_damage_on_hit_matches_projectile(dungeon):
+    results = []
+    for run in (run_reference, run_system):
+        owner = Target(dungeon, *START)
+        target = Target(dungeon, START[0] + 3, START[1])
+        dungeon.add_entity(owner)
+        dungeon.add_entity(target)
+        trace = run(dungeon, (1, 0), speed=0.25, range_in_tiles=10, damage=4, owner=owner)
+        hits = [(amount, source is owner) for amount, source in target.hits]
+        results.append((len(trace), target.health, hits, owner.hits))
+        dungeon.remove_entity(owner)
+        dungeon.remove_entity(target)
+    reference, system = results
+    assert reference == system
+    # The target took one hit from the owner's projectile, the owner none
+    assert reference[1] == 6 and reference[2] == [(4, True)] and reference[3] == []
@@ -0,0 +1,77 @@
+import os
+import random
+import sys
+
+import pygame
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from config import TILE_SIZE_X, TILE_SIZE_Y
+from core.systems.spatial_hash import SpatialHash
+
+
+class Body:
+    def __init__(self, x, y):
+        self.place(x, y)
+
+    def place(self, x, y):
+        self.x = x
+        self.y = y
+        self.rect = pygame.Rect(round(x * TILE_SIZE_X), round(y * TILE_SIZE_Y), TILE_SIZE_X, TILE_SIZE_Y)
+
+
+def scattered(seed, count=300, size=80):
+    rng = random.Random(seed)
+    return [Body(rng.uniform(0, size), rng.uniform(0, size)) for _ in range(count)]
+
+
+def filled(bodies, cell_size):
+    spatial = SpatialHash(cell_size)
+    for body in bodies:
+        spatial.insert(body)
+    return spatial
+
+
+def near(bodies, x, y, radius):
+    return {body for body in bodies if abs(body.x - x) + abs(body.y - y) <= radius}
+
+
+@pytest.mark.parametrize("cell_size", [1, 4, 7])
+def test_query_radius_matches_brute_force(cell_size):
+    bodies = scattered(cell_size)
+    spatial = filled(bodies, cell_size)
+    rng = random.Random(0)
+    for _ in range(200):
+        x, y = rng.uniform(-5, 85), rng.uniform(-5, 85)
+        radius = rng.choice([0, 1, 2.5, 5, 12, 60])
+        found = spatial.query_radius(x, y, radius)
+        assert len(found) == len(set(found))
+        assert set(found) == near(bodies, x, y, radius)
+
+
+def test_query_radius_follows_moves_and_removals():
+    bodies = scattered(1)
+    spatial = filled(bodies, 4)
+    rng = random.Random(1)
+    for body in bodies[:100]:
+        body.place(rng.uniform(0, 80), rng.uniform(0, 80))
+        spatial.update(body)
+    for body in bodies[100:150]:
+        spatial.remove(body)
+    remaining = bodies[:100] + bodies[150:]
+    assert len(spatial) == len(remaining)
+    for _ in range(100):
+        x, y, radius = rng.uniform(0, 80), rng.uniform(0, 80), rng.uniform(0, 20)
+        assert set(spatial.query_radius(x, y, radius)) == near(remaining, x, y, radius)
+
+
+def test_query_rect_matches_brute_force():
+    bodies = scattered(2)
+    spatial = filled(bodies, 4)
+    rng = random.Random(2)
+    for _ in range(200):
+        rect = pygame.Rect(rng.randint(-2, 80) * TILE_SIZE_X + rng.randint(0, TILE_SIZE_X),
+                           rng.randint(-2, 80) * TILE_SIZE_Y + rng.randint(0, TILE_SIZE_Y),
+                           rng.randint(1, 10 * TILE_SIZE_X), rng.randint(1, 10 * TILE_SIZE_Y))
+        assert set(spatial.query_rect(rect)) == {body for body in bodies if rect.colliderect(body.rect)}